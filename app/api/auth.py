@@ -1,11 +1,14 @@
 from app.error.error import APIException, ErrorCode
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 import logging
 import os
 from dotenv import load_dotenv
 
 from ..security.jwt_handler import create_access_token
+from ..security.password_security import PasswordHasherOverloaded
 from app.models.auth import TokenResponse, LoginRequest
+from app.services.dependencies import get_user_service
+from app.services.user_service import UserService
 
 router = APIRouter()
 logger = logging.getLogger("main.api.users")
@@ -17,21 +20,34 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
 @router.post("/v1/users/login")
-async def login(request: Request, login_request: LoginRequest):
+async def login(
+    request: Request,
+    login_request: LoginRequest,
+    service: UserService = Depends(get_user_service)
+):
     
     logger.info(f"Login request for {login_request.username}",
         extra={
-        "request_id": request.state.request_id,
         "username": login_request.username
     })
     
-    service = request.app.state.user_service
-    user = service.authenticate_user(login_request.username, login_request.password)
+    try:
+        user = await service.authenticate_user(login_request.username, login_request.password)
+    except PasswordHasherOverloaded:
+        logger.warning(f"Login rejected for {login_request.username}: password hashing overloaded",
+        extra={
+            "username": login_request.username
+        })
+        raise APIException(
+            code=ErrorCode.SERVICE_UNAVAILABLE,
+            status_code=503,
+            message="Server is busy, please retry",
+            details={"username": login_request.username}
+        )
 
     if not user:
         logger.warning(f"Logging failed for {login_request.username}", 
         extra={
-            "request_id": request.state.request_id,
             "username": login_request.username
         })
         raise APIException(
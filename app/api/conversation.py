@@ -1,9 +1,14 @@
 from app.models.message import MessageResponse
 from app.services.message_service import MessageService
-from fastapi import APIRouter, Request, Depends, Query
+from app.services.conversation_service import ConversationService
+from app.repositories.conversation_repository import UnknownMembersError
+from app.db.search import SearchTimeoutError, SearchUnavailableError
+from app.services.user_service import UserService
+from app.services.dependencies import get_conversation_service, get_message_service, get_user_service
+from fastapi import APIRouter, Request, Response, Depends, Query
 from fastapi.responses import JSONResponse
 import logging
-from typing import List
+from typing import List, Optional
 import time
 
 from app.error.error import APIException, ErrorCode
@@ -17,19 +22,17 @@ logger = logging.getLogger("main.api.conversation")
 async def create_conversation(
     request: Request,
     conversation_request: CreateConversationRequest,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    conversation_service: ConversationService = Depends(get_conversation_service),
+    user_service: UserService = Depends(get_user_service)
 ):
     try:
         logger.info(f"Conversation creation request",
                     extra={
                         "username": current_user.username, 
-                        "request_id": request.state.request_id
                     })
 
-        conversation_service = request.app.state.conversation_service
-        user_service = request.app.state.user_service
-        
-        if not user_service.get_user_by_id(current_user.id):
+        if not await user_service.get_user_by_id(current_user.id):
             raise APIException(
                 code=ErrorCode.USER_NOT_FOUND,
                 status_code=404,
@@ -37,20 +40,31 @@ async def create_conversation(
                 details={"username": current_user.username}
             )
         
-        conversation = conversation_service.create_conversation(
-            conversation_request, current_user
-        )
+        try:
+            conversation = await conversation_service.create_conversation(
+                conversation_request, current_user
+            )
+        except UnknownMembersError as e:
+            raise APIException(
+                code=ErrorCode.USER_NOT_FOUND,
+                status_code=400,
+                message="Some members do not exist",
+                details={"member_ids": e.member_ids}
+            )
         
+        # The created conversation comes back with creator and members loaded
         return JSONResponse(
             status_code=201, 
-            content=conversation_service.get_conversation_response(conversation.id).dict()
+            content=conversation_service.build_conversation_response(conversation).dict()
         )
+
+    except APIException:
+        raise
     
     except Exception as e:
         logger.error(f"Error creating conversation: {e}",
                      extra={
                          "username": current_user.username, 
-                         "request_id": request.state.request_id
                      })
         raise APIException(
             code=ErrorCode.CONVERSATION_CREATION_FAILED,
@@ -60,19 +74,22 @@ async def create_conversation(
         )
     
 @router.get("/v1/conversations", response_model=List[ConversationResponse])
-async def get_conversations(request: Request, current_user = Depends(get_current_user)):
+async def get_conversations(
+    request: Request,
+    current_user = Depends(get_current_user),
+    conversation_service: ConversationService = Depends(get_conversation_service)
+):
     try:
         logger.info(f"Conversation fetch request",
                     extra={
                         "username": current_user.username, 
-                        "request_id": request.state.request_id
                     })
 
-        conversation_service = request.app.state.conversation_service
-        conversations = conversation_service.get_user_conversations(current_user.username)
+        conversations = await conversation_service.get_user_conversations(current_user.username)
         
+        # Conversations arrive with creator and members loaded, so building responses runs no queries
         conversation_reponses = [
-            conversation_service.get_conversation_response(conv.id).dict() for conv in conversations
+            conversation_service.build_conversation_response(conv).dict() for conv in conversations
         ]
         
         return JSONResponse(
@@ -84,7 +101,6 @@ async def get_conversations(request: Request, current_user = Depends(get_current
         logger.error(f"Error fetching conversations: {e}",
                      extra={
                          "username": current_user.username,
-                         "request_id": request.state.request_id
                      })
         raise APIException(
             code=ErrorCode.CONVERSATION_FETCH_FAILED,
@@ -96,26 +112,27 @@ async def get_conversations(request: Request, current_user = Depends(get_current
 @router.get("/v1/conversations/{conversation_id}/messages", response_model=List[MessageResponse])
 async def get_conversation_messages(
     request: Request,
+    response: Response,
     conversation_id: str,
     limit: int = Query(50),
     before: float = Query(None),
-    user = Depends(get_current_user)
+    cursor: str = Query(None),
+    user = Depends(get_current_user),
+    message_service: MessageService = Depends(get_message_service),
+    conversation_service: ConversationService = Depends(get_conversation_service),
+    user_service: UserService = Depends(get_user_service)
 ):
     try:
         logger.info(f"Message fetch request for conversation {conversation_id}",
                     extra={
                         "username": user.username, 
-                        "request_id": request.state.request_id,
                         "conversation_id": conversation_id,
                         "limit": limit,
-                        "before": before
+                        "before": before,
+                        "cursor": cursor
                     })
         
-        message_service: MessageService = request.app.state.message_service
-        messages = message_service.get_messages(conversation_id=conversation_id, limit=limit, before_timestamp=before)
-        conversation_service = request.app.state.conversation_service
-
-        if not conversation_service.check_if_user_has_access_to_conversation(user.id, conversation_id):
+        if not await conversation_service.check_if_user_has_access_to_conversation(user.id, conversation_id):
             logger.info(f"User {user.name} attempted to view messages in unauthorized conversation {conversation_id}")
             raise APIException(
                 code=ErrorCode.UNAUTHORIZED_ACCESS,
@@ -124,25 +141,181 @@ async def get_conversation_messages(
                 details={"conversation_id": conversation_id}
             )
 
-        responses: List[MessageResponse] = []
-        for msg in messages:
-            msg_response = message_service.create_message_response(
-                msg, request.app.state.user_service, request.app.state.conversation_service
+        try:
+            page = await message_service.get_message_page(
+                conversation_id=conversation_id, limit=limit, cursor=cursor, before_timestamp=before
             )
-            responses.append(msg_response)
+        except ValueError:
+            raise APIException(
+                code=ErrorCode.INVALID_REQUEST,
+                status_code=400,
+                message="Invalid cursor",
+                details={"cursor": cursor}
+            )
+
+        # Build the whole page at once: one conversation load and one bulk sender lookup
+        responses: List[MessageResponse] = await message_service.create_message_responses(
+            page.messages, user_service, conversation_service
+        )
+
+        # The body stays a plain list, so cursors travel in headers
+        if page.next_cursor:
+            response.headers["X-Next-Cursor"] = page.next_cursor
+        if page.prev_cursor:
+            response.headers["X-Prev-Cursor"] = page.prev_cursor
 
         return responses
 
+    except APIException:
+        raise
+
     except Exception as e:
         logger.error(f"Error fetching conversation messages: {e}", 
                      extra={
                          "username": user.username,
                          "conversation_id": conversation_id,
-                         "request_id": request.state.request_id
                      })
         raise APIException(
             code=ErrorCode.MESSAGE_FETCH_FAILED,
             status_code=500,
             message="Failed to fetch messages",
             details={"error": str(e)}
-        )
\ No newline at end of file
+        )
+
+async def search_message_page(
+    response: Response,
+    message_service: MessageService,
+    conversation_service: ConversationService,
+    user_service: UserService,
+    q: str,
+    limit: int,
+    cursor: Optional[str],
+    conversation_id: Optional[str] = None,
+    member_id: Optional[str] = None
+) -> List[MessageResponse]:
+    """Run a search and render one page of it, shared by the search endpoints"""
+    try:
+        page = await message_service.search_messages(
+            q, limit, cursor, conversation_id=conversation_id, member_id=member_id
+        )
+    except ValueError:
+        raise APIException(
+            code=ErrorCode.INVALID_REQUEST,
+            status_code=400,
+            message="Invalid cursor",
+            details={"cursor": cursor}
+        )
+    except SearchTimeoutError:
+        raise APIException(
+            code=ErrorCode.SERVICE_UNAVAILABLE,
+            status_code=503,
+            message="Search took too long, try more specific terms",
+            details={"q": q}
+        )
+    except SearchUnavailableError as e:
+        raise APIException(
+            code=ErrorCode.SERVICE_UNAVAILABLE,
+            status_code=503,
+            message="Message search is not available",
+            details={"database": e.dialect}
+        )
+
+    responses: List[MessageResponse] = await message_service.create_message_responses(
+        page.messages, user_service, conversation_service
+    )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return responses
+
+@router.get("/v1/conversations/{conversation_id}/messages/search", response_model=List[MessageResponse])
+async def search_conversation_messages(
+    request: Request,
+    response: Response,
+    conversation_id: str,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = Query(None),
+    user = Depends(get_current_user),
+    message_service: MessageService = Depends(get_message_service),
+    conversation_service: ConversationService = Depends(get_conversation_service),
+    user_service: UserService = Depends(get_user_service)
+):
+    try:
+        logger.info(f"Message search request for conversation {conversation_id}",
+                    extra={
+                        "username": user.username,
+                        "conversation_id": conversation_id,
+                        "limit": limit,
+                        "cursor": cursor
+                    })
+
+        if not await conversation_service.check_if_user_has_access_to_conversation(user.id, conversation_id):
+            logger.info(f"User {user.name} attempted to search messages in unauthorized conversation {conversation_id}")
+            raise APIException(
+                code=ErrorCode.UNAUTHORIZED_ACCESS,
+                status_code=403,
+                message="You do not have access to this conversation",
+                details={"conversation_id": conversation_id}
+            )
+
+        return await search_message_page(
+            response, message_service, conversation_service, user_service,
+            q, limit, cursor, conversation_id=conversation_id
+        )
+
+    except APIException:
+        raise
+
+    except Exception as e:
+        logger.error(f"Error searching conversation messages: {e}",
+                     extra={
+                         "username": user.username,
+                         "conversation_id": conversation_id,
+                     })
+        raise APIException(
+            code=ErrorCode.MESSAGE_FETCH_FAILED,
+            status_code=500,
+            message="Failed to search messages",
+            details={"error": str(e)}
+        )
+
+@router.get("/v1/messages/search", response_model=List[MessageResponse])
+async def search_messages(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = Query(None),
+    user = Depends(get_current_user),
+    message_service: MessageService = Depends(get_message_service),
+    conversation_service: ConversationService = Depends(get_conversation_service),
+    user_service: UserService = Depends(get_user_service)
+):
+    try:
+        logger.info(f"Message search request across conversations",
+                    extra={
+                        "username": user.username,
+                        "limit": limit,
+                        "cursor": cursor
+                    })
+
+        # Only conversations the caller is a member of are searched
+        return await search_message_page(
+            response, message_service, conversation_service, user_service,
+            q, limit, cursor, member_id=user.id
+        )
+
+    except APIException:
+        raise
+
+    except Exception as e:
+        logger.error(f"Error searching messages: {e}",
+                     extra={
+                         "username": user.username,
+                     })
+        raise APIException(
+            code=ErrorCode.MESSAGE_FETCH_FAILED,
+            status_code=500,
+            message="Failed to search messages",
+            details={"error": str(e)}
+        )
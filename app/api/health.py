@@ -1,6 +1,12 @@
 from fastapi import APIRouter, Request, Depends
 from app.db.redis_client import RedisClient
 from app.utils.cache import Cache
+from app.security.password_security import password_hasher
+from app.security.token_cache import token_cache
+from app.logging import LoggerFactory
+from app.db import engine
+from app.db.pool import get_pool_stats
+from app.db.routing import read_router
 
 router = APIRouter()
 
@@ -11,7 +17,7 @@ async def health_check():
 @router.get("/health/redis", tags=["health"])
 async def redis_health_check(request: Request):
     redis_client = request.app.state.redis_client
-    redis_status = "ok" if redis_client.check_health() else "error"
+    redis_status = "ok" if await redis_client.check_health() else "error"
     return {"status": redis_status, "message": f"Redis is {redis_status}"}
 
 @router.get("/health/cache/metrics", tags=["health"])
@@ -25,5 +31,34 @@ async def cache_metrics(request: Request):
         "hits": cache.hits,
         "misses": cache.misses,
         "hit_rate": f"{hit_rate:.2f}%",
-        "cache_enabled": cache.is_connected
+        "cache_enabled": cache.is_connected,
+        "codec": cache.codec.name,
+        "tiers": cache.get_tier_stats()
     }
+
+@router.get("/health/password-hashing/metrics", tags=["health"])
+async def password_hashing_metrics():
+    return password_hasher.get_stats()
+
+@router.get("/health/auth/metrics", tags=["health"])
+async def auth_metrics():
+    return token_cache.get_stats()
+
+@router.get("/health/logging/metrics", tags=["health"])
+async def logging_metrics():
+    return LoggerFactory.get_stats()
+
+@router.get("/health/db/pool", tags=["health"])
+async def db_pool_metrics():
+    return {
+        **get_pool_stats(engine),
+        "replicas": [get_pool_stats(replica) for replica in read_router.replicas]
+    }
+
+@router.get("/health/db/replicas", tags=["health"])
+async def db_replica_metrics():
+    return read_router.get_stats()
+
+@router.get("/health/messages/archive", tags=["health"])
+async def message_archive_metrics(request: Request):
+    return request.app.state.message_archiver.get_stats()
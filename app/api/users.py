@@ -4,22 +4,27 @@ import logging
 from ..models.user import UserRegistrationResponse, UserRegistrationRequest, UserResponse
 from app.middleware.auth import get_current_user
 from app.error.error import APIException, ErrorCode
+from app.services.dependencies import get_user_service
+from app.services.user_service import UserService
+from app.security.password_security import PasswordHasherOverloaded
 
 router = APIRouter()
 logger = logging.getLogger("main.api.users")
 
 @router.post("/v1/users/register", response_model=UserRegistrationResponse)
-async def register_user(request: Request, user_request: UserRegistrationRequest):    
+async def register_user(
+    request: Request,
+    user_request: UserRegistrationRequest,
+    service: UserService = Depends(get_user_service)
+):    
     try:
         logger.info(f"User registration request for username: {user_request.username}",
                     extra={
-                        "request_id": request.state.request_id,
                         "username": user_request.username
                         })
         
-        service = request.app.state.user_service
         logger.info(f"Checking if username {user_request.username} is already taken")
-        user = service.get_user(user_request.username)
+        user = await service.get_user(user_request.username)
         logger.info(f"User lookup result for username {user_request.username}: {user}")
         if user:
             raise APIException(
@@ -29,11 +34,10 @@ async def register_user(request: Request, user_request: UserRegistrationRequest)
             )
         
         logger.info(f"Registering new user: {user_request.username}")
-        user = service.add_user(user_request)
+        user = await service.add_user(user_request)
 
         logger.info(f"User registered: {user.username} (ID: {user.id})",
                     extra={
-                        "request_id": request.state.request_id,
                         "username": user.username
                     })
 
@@ -46,10 +50,20 @@ async def register_user(request: Request, user_request: UserRegistrationRequest)
                 status=user.status
             ).dict()
         )
+    except PasswordHasherOverloaded:
+        logger.warning(f"Registration rejected for {user_request.username}: password hashing overloaded",
+                       extra={
+                           "username": user_request.username
+                       })
+        raise APIException(
+            code=ErrorCode.SERVICE_UNAVAILABLE,
+            status_code=503,
+            message="Server is busy, please retry",
+            details={"username": user_request.username}
+        )
     except Exception as e:
         logger.error(f"Error occurred while registering user: {e}",
                      extra={
-                         "request_id": request.state.request_id,
                          "username": user_request.username
                      })
         raise APIException(
@@ -62,7 +76,6 @@ async def register_user(request: Request, user_request: UserRegistrationRequest)
 async def me(request: Request, user=Depends(get_current_user)):
     logger.info(f"User info requested for user: {user.username}",
                 extra={
-                    "request_id": request.state.request_id,
                     "username": user.username
                 })
     
@@ -74,28 +87,30 @@ async def me(request: Request, user=Depends(get_current_user)):
     )
     
 @router.get("/v1/users")
-async def get_all_users(request: Request, current_user = Depends(get_current_user)):
+async def get_all_users(
+    request: Request,
+    current_user = Depends(get_current_user),
+    service: UserService = Depends(get_user_service)
+):
     """Get all users except the current user"""
     try:
         logger.info(f"Fetching all users excluding current user {current_user.username}",
                     extra={
-                        "request_id": request.state.request_id,
                         "username": current_user.username
                     })
         
-        service = request.app.state.user_service
-        users = service.get_all_users()
+        users = await service.get_all_users()
         
         other_users = [user for user in users if user.id != current_user.id]
         logger.info(f"Retrieved {len(other_users)} users excluding current user {current_user.username}")
         return JSONResponse(
             status_code=200,
-            content=[service.get_user_response(user.id).dict() for user in other_users]
+            # The listing already carries every field, so no per-user lookups are needed
+            content=[UserService.to_user_response(user).dict() for user in other_users]
         )
     except Exception as e:
         logger.error(f"Error retrieving users: {str(e)}",
                      extra={
-                            "request_id": request.state.request_id,
                             "username": current_user.username
                         })
         raise APIException(
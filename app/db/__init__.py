@@ -1,6 +1,9 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.pool import engine_options, set_pool_label
+from app.db.routing import TrackedSession, read_router
+from app.utils.metrics import instrument_engine
 
 # Load DB connection from environment variables
 DB_USER = os.getenv("DB_USER", "chatuser")
@@ -9,18 +12,29 @@ DB_HOST = os.getenv("DB_HOST", "db")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME", "chatapp")
 
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# DATABASE_URL overrides the individual settings, e.g. "sqlite+aiosqlite:///./chatter.db" for local runs
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# SQLAlchemy async engine, shared by every request on this worker. Pool settings come from DB_POOL_* (see app.db.pool)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_engine(engine.sync_engine)
+set_pool_label(engine, "primary")
 
-# SQLAlchemy engine
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Optional read replicas, comma separated. Repositories send their reads here (see app.db.routing)
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+for index, replica_url in enumerate(DATABASE_REPLICA_URLS):
+    replica_engine = create_async_engine(replica_url, **engine_options(replica_url))
+    instrument_engine(replica_engine.sync_engine)
+    set_pool_label(replica_engine, f"replica{index}")
+    read_router.replicas.append(replica_engine)
 
-# Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Session factory. Objects stay usable after commit so responses can be built from them
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False, sync_session_class=TrackedSession)
 
-# Dependency function for FastAPI or manual usage
-def get_db():
-    db = SessionLocal()
-    try:
+# Dependency function for FastAPI: one session per request
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
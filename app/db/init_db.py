@@ -1,20 +1,27 @@
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.base import Base
-from app.db.models import User, Conversation, Message
+from app.db.models import User, Conversation, Message, ArchivedMessage
 from app.db import engine
+from app.db.search import create_search_indexes
 from app.models.user import UserStatus
 from app.security.password_security import hash_password
 
 logger = logging.getLogger(__name__)
 
-def create_tables():
+async def create_tables():
     """Create database tables if they don't exist"""
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # create_all only builds indexes along with new tables, so add any missing ones to existing tables
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                await conn.run_sync(lambda sync_conn, index=index: index.create(sync_conn, checkfirst=True))
+        await create_search_indexes(conn)
     logger.info("Database tables created")
 
-def init_db(db: Session):
+async def init_db(db: AsyncSession):
     """Initialize the database with initial setup if needed"""
     # Log the database initialization
     logger.info("Checking database setup")
@@ -1,13 +1,12 @@
-from sqlalchemy import Column, Float, Enum as SqlEnum, ForeignKey, Text, String
+from sqlalchemy import Column, Float, Enum as SqlEnum, ForeignKey, Index, Text, String
 from sqlalchemy.orm import relationship
 import uuid
 
 from app.db.base import Base
 from app.models.message import MessageType, MessageDeliveryStatus
 
-class Message(Base):
-    __tablename__ = "messages"
-
+class MessageColumns:
+    """Columns shared by the hot messages table and its archive"""
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     sender_id = Column(String, ForeignKey("users.id"), nullable=False)
     conversation_id = Column(String, ForeignKey("conversations.id"), nullable=False)
@@ -16,6 +15,24 @@ class Message(Base):
     type = Column(SqlEnum(MessageType), nullable=False, default=MessageType.TEXT)
     status = Column(SqlEnum(MessageDeliveryStatus), nullable=False, default=MessageDeliveryStatus.PENDING)
 
+class Message(MessageColumns, Base):
+    """Recent messages. Rows older than MESSAGE_ARCHIVE_AFTER_DAYS move to ArchivedMessage"""
+    __tablename__ = "messages"
+    __table_args__ = (
+        # Serves history paging: equality on conversation_id, then a range scan in (timestamp, id) order.
+        # id breaks ties between messages that share a timestamp.
+        Index("ix_messages_conversation_timestamp_id", "conversation_id", "timestamp", "id"),
+        # Lets the archiver find the oldest rows without scanning the table
+        Index("ix_messages_timestamp", "timestamp"),
+    )
+
     # Relationships
     sender = relationship("User", back_populates="messages")
     conversation = relationship("Conversation", back_populates="messages")
+
+class ArchivedMessage(MessageColumns, Base):
+    """Cold history, moved out of messages by the MessageArchiver"""
+    __tablename__ = "messages_archive"
+    __table_args__ = (
+        Index("ix_messages_archive_conversation_timestamp_id", "conversation_id", "timestamp", "id"),
+    )
@@ -0,0 +1,113 @@
+import os
+import time
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.utils.metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_TIMEOUTS
+
+# Connections kept open per worker. Size so that workers x (size + overflow) stays under Postgres max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+# Extra connections opened under load and closed once returned
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Connections older than this many seconds are replaced on checkout; -1 never recycles
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Test each connection with a round trip on checkout. Recycling covers most stale connections without it
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waits, so starvation shows up in metrics.
+    Series are labelled with engine_label, set by set_pool_label.
+    """
+    engine_label = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.labels(engine=self.engine_label).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(engine=self.engine_label).observe(time.perf_counter() - start)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool, which must keep reporting under the same label
+        pool = super().recreate()
+        pool.engine_label = self.engine_label
+        return pool
+
+def set_pool_label(engine: AsyncEngine, label: str) -> None:
+    """
+    Name the engine's pool in metrics, e.g. "primary" or "replica0".
+    """
+    engine.pool.engine_label = label
+
+def engine_options(database_url: str) -> dict:
+    """
+    Engine keyword arguments for the configured pool.
+    
+    Args:
+        database_url: The database URL the engine is created for
+    Returns:
+        dict: Pool settings. In-memory SQLite keeps its single shared connection.
+    """
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    options.update(
+        poolclass=TimedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+def get_pool_stats(engine: AsyncEngine) -> dict:
+    """
+    Live pool usage and the checkout-wait distribution for this worker.
+    
+    Args:
+        engine: The engine whose pool to report
+    Returns:
+        dict: Pool configuration, current usage and checkout-wait histogram
+    """
+    pool = engine.pool
+    label = getattr(pool, "engine_label", None)
+    stats = {"pool": type(pool).__name__, "engine": label, "pre_ping": DB_POOL_PRE_PING}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "recycle": pool._recycle,
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # Negative while the pool has not opened pool_size connections yet
+            "overflow": pool.overflow(),
+        })
+
+    wait = {"count": 0, "sum_ms": 0.0, "buckets_ms": {}, "timeouts": 0}
+    for metric in DB_POOL_CHECKOUT_WAIT.collect():
+        for sample in metric.samples:
+            if sample.labels.get("engine") != label:
+                continue
+            if sample.name.endswith("_bucket"):
+                bound = sample.labels["le"]
+                wait["buckets_ms"][bound if bound == "+Inf" else f"{float(bound) * 1000:g}"] = int(sample.value)
+            elif sample.name.endswith("_count"):
+                wait["count"] = int(sample.value)
+            elif sample.name.endswith("_sum"):
+                wait["sum_ms"] = round(sample.value * 1000, 2)
+    for metric in DB_POOL_TIMEOUTS.collect():
+        for sample in metric.samples:
+            if sample.labels.get("engine") == label and sample.name.endswith("_total"):
+                wait["timeouts"] = int(sample.value)
+    stats["checkout_wait"] = wait
+    return stats
@@ -0,0 +1,33 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class QueryStats:
+    """
+    SQL work done on behalf of one request.
+    """
+    queries: int = 0
+    rows: int = 0
+    db_time: float = 0.0
+
+    def record(self, elapsed: float, rowcount: int) -> None:
+        self.queries += 1
+        # rowcount is -1 when the driver does not know it, e.g. for most SELECTs before fetching
+        if rowcount and rowcount > 0:
+            self.rows += rowcount
+        self.db_time += elapsed
+
+    def to_dict(self) -> dict:
+        return {"queries": self.queries, "rows": self.rows, "db_time_ms": round(self.db_time * 1000, 2)}
+
+# Set by QueryStatsMiddleware for the duration of each request; engine events add to it
+query_stats_var: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def record_query(elapsed: float, rowcount: int) -> None:
+    """
+    Count a finished statement against the current request, if there is one.
+    """
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.record(elapsed, rowcount)
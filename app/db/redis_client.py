@@ -1,26 +1,54 @@
 import os
-from redis import Redis
+import time
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.client import Pipeline
+
+from app.utils.metrics import REDIS_COMMAND_DURATION
+
+class InstrumentedRedis(Redis):
+    """
+    Redis client that records the latency of every command it sends.
+    """
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(command=str(args[0]).upper()).observe(time.perf_counter() - start)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> "InstrumentedPipeline":
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+class InstrumentedPipeline(Pipeline):
+    """
+    Pipeline timed as a whole, since its commands share one round trip.
+    """
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_DURATION.labels(command="PIPELINE").observe(time.perf_counter() - start)
 
 class RedisClient:
     def __init__(self):
         self.host: str = os.getenv("REDIS_HOST", "localhost")
         self.port: int = int(os.getenv("REDIS_PORT", 6379))
         self.db: int = int(os.getenv("REDIS_DB", 0))
+        # Connection pool shared by every coroutine on this worker
+        self.max_connections: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+        self.pool_timeout: float = float(os.getenv("REDIS_POOL_TIMEOUT", 5))
+        self.socket_timeout: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", 5))
+        self.socket_connect_timeout: float = float(os.getenv("REDIS_CONNECT_TIMEOUT", 2))
+        self._pool: BlockingConnectionPool = None
         self._client: Redis = None
         
-    def initialize_connection(self) -> None:
+    async def initialize_connection(self) -> None:
         """
         Initialize Redis connection.
         """
-        if self._client is None:
-            self._client = Redis(
-                host=self.host,
-                port=self.port,
-                db=self.db,
-                decode_responses=False
-            )
         try:
-            self._client.ping()
+            await self.get_client().ping()
             print("✅ Connected to Redis")
         except Exception as e:
             print(f"❌ Failed to connect to Redis: {e}")
@@ -28,16 +56,29 @@ class RedisClient:
     
     def get_client(self) -> Redis:
         """
-        Get the Redis client instance.
+        Get the Redis client instance. Creating it does not open a connection;
+        connections are taken from the pool as commands run.
         
         Returns:
             Redis: The Redis client instance.
         """
         if self._client is None:
-            self.initialize_connection()
+            # A blocking pool makes callers wait up to pool_timeout for a free connection
+            # instead of failing as soon as max_connections are in use
+            self._pool = BlockingConnectionPool(
+                host=self.host,
+                port=self.port,
+                db=self.db,
+                max_connections=self.max_connections,
+                timeout=self.pool_timeout,
+                socket_timeout=self.socket_timeout,
+                socket_connect_timeout=self.socket_connect_timeout,
+                decode_responses=False
+            )
+            self._client = InstrumentedRedis(connection_pool=self._pool)
         return self._client
     
-    def check_health(self) -> bool:
+    async def check_health(self) -> bool:
         """
         Check if Redis connection is healthy.
         
@@ -45,20 +86,22 @@ class RedisClient:
             bool: True if connection is healthy, False otherwise.
         """
         try:
-            return self.get_client().ping()
+            return await self.get_client().ping()
         except Exception:
             return False
         
-    def close(self) -> None:
+    async def close(self) -> None:
         """
-        Close the Redis connection.
+        Close the Redis connection pool.
         """
         if self._client:
-            self._client.close()
+            await self._client.aclose()
+            await self._pool.disconnect()
             self._client = None
+            self._pool = None
             print("Redis connection closed")
             
-    def get_value(self, key: str) -> str:
+    async def get_value(self, key: str) -> str:
         """
         Get a value from Redis by key.
         
@@ -67,9 +110,9 @@ class RedisClient:
         Returns:
             str: The value associated with the key, or None if not found.
         """
-        return self.get_client().get(key)
+        return await self.get_client().get(key)
     
-    def set_value(self, key: str, value: str, ttl: int = None) -> None:
+    async def set_value(self, key: str, value: str, ttl: int = None) -> None:
         """
         Set a value in Redis with an optional expiration time.
         
@@ -78,9 +121,9 @@ class RedisClient:
             value (str): The value to associate with the key.
             ttl (int, optional): Expiration time in seconds. Defaults to None.
         """
-        self.get_client().set(name=key, value=value, ex=ttl)
+        await self.get_client().set(name=key, value=value, ex=ttl)
 
-    def delete_value(self, key: str) -> int:
+    async def delete_value(self, key: str) -> int:
         """
         Delete a value from Redis by key.
         Args:
@@ -88,4 +131,4 @@ class RedisClient:
         Returns:
             int: The number of keys that were removed.
         """
-        return self.get_client().delete(key)
\ No newline at end of file
+        return await self.get_client().delete(key)
@@ -0,0 +1,153 @@
+import os
+import time
+import logging
+from contextvars import ContextVar
+from itertools import count
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("main.db.routing")
+
+# Seconds a replica that failed is skipped before reads are sent to it again
+REPLICA_RETRY_AFTER = float(os.getenv("REPLICA_RETRY_AFTER", 30))
+
+# Session.info key set once a session has written; its reads stay on the primary from then on
+SESSION_WROTE = "wrote"
+
+# Read target set by execute_read while its statement runs: a replica engine or PRIMARY.
+# Loader follow-ups (selectinload etc.) run inside the same execute, so they follow it too
+PRIMARY = "primary"
+read_target_var: ContextVar[Optional[object]] = ContextVar("read_target", default=None)
+
+class TrackedSession(Session):
+    """
+    Sync session behind every AsyncSession, tracking whether it has written
+    and sending execute_read's statements to the chosen read target.
+    """
+    def get_bind(self, mapper=None, clause=None, **kw):
+        target = read_target_var.get()
+        if target is not None:
+            if target is not PRIMARY and not self.info.get(SESSION_WROTE):
+                read_router.replica_reads += 1
+                return target.sync_engine
+            read_router.primary_reads += 1
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+@event.listens_for(TrackedSession, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info[SESSION_WROTE] = True
+
+@event.listens_for(TrackedSession, "do_orm_execute")
+def _mark_dml(orm_execute_state):
+    # Core insert()/update()/delete() run through session.execute skip the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[SESSION_WROTE] = True
+
+class ReadReplicaRouter:
+    """
+    Picks a replica engine for reads, round robin, skipping replicas that recently failed.
+    With no replicas configured every read goes to the primary.
+    """
+    def __init__(self, replicas: List[AsyncEngine] = None, retry_after: float = None):
+        self.replicas = replicas or []
+        self.retry_after = REPLICA_RETRY_AFTER if retry_after is None else retry_after
+        self._down_until: Dict[int, float] = {}
+        self._next = count()
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+
+    def pick(self) -> Optional[AsyncEngine]:
+        """
+        Returns:
+            The next healthy replica, or None if there is none
+        """
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            index = next(self._next) % len(self.replicas)
+            if self._down_until.get(index, 0) <= now:
+                return self.replicas[index]
+        return None
+
+    def mark_down(self, replica: AsyncEngine) -> None:
+        index = self.replicas.index(replica)
+        self._down_until[index] = time.monotonic() + self.retry_after
+        logger.warning(f"Read replica {replica.url.render_as_string(hide_password=True)} failed, "
+                       f"using the primary for {self.retry_after:g}s")
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.dispose()
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "replicas": [
+                {
+                    "url": replica.url.render_as_string(hide_password=True),
+                    "healthy": self._down_until.get(index, 0) <= now,
+                }
+                for index, replica in enumerate(self.replicas)
+            ],
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+        }
+
+# Set up in app.db from DATABASE_REPLICA_URLS
+read_router = ReadReplicaRouter()
+
+def is_statement_timeout(error: Exception) -> bool:
+    """
+    Whether a database error is Postgres cancelling a statement (SQLSTATE 57014), e.g. for statement_timeout.
+    """
+    orig = getattr(error, "orig", error)
+    return (getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)) == "57014"
+
+async def execute_read(db: AsyncSession, statement):
+    """
+    Run a read-only statement on a replica when one is available.
+
+    Reads stay on the primary once the session has written, so a session always
+    sees its own writes, and fall back to the primary if the replica cannot be reached.
+    Queries the ORM issues to load relationships go to the same place as the statement.
+    
+    Args:
+        db: The session to run the statement in
+        statement: A SELECT
+    Returns:
+        The Result, as from db.execute
+    """
+    results = await execute_reads(db, [statement])
+    return results[0]
+
+async def execute_reads(db: AsyncSession, statements: List) -> List:
+    """
+    Run read-only statements one after another on the same read target, so settings made
+    by one (e.g. SET LOCAL) apply to the next. Routed and retried like execute_read.
+
+    Args:
+        db: The session to run the statements in
+        statements: SELECTs, and any SETs scoping them, in order
+    Returns:
+        Their Results, in order
+    """
+    replica = None if db.info.get(SESSION_WROTE) else read_router.pick()
+    token = read_target_var.set(replica or PRIMARY)
+    try:
+        return [await db.execute(statement) for statement in statements]
+    except (OperationalError, InterfaceError, OSError) as e:
+        # A cancelled statement is the statement's doing, not the replica's
+        if replica is None or is_statement_timeout(e):
+            raise
+        logger.error(f"Replica read failed: {e}")
+        read_router.mark_down(replica)
+        read_router.fallbacks += 1
+        read_target_var.set(PRIMARY)
+        return [await db.execute(statement) for statement in statements]
+    finally:
+        read_target_var.reset(token)
@@ -0,0 +1,152 @@
+import os
+import re
+import logging
+from typing import Optional, Tuple, Type
+
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import Executable, Select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.models.message import ArchivedMessage, Message, MessageColumns
+
+logger = logging.getLogger("main.db.search")
+
+# Postgres text search configuration used to build and query the search vectors
+SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "english")
+
+# Generated tsvector column on Postgres
+SEARCH_VECTOR = "search_vector"
+
+# Longest a search may run on Postgres before the database cancels it
+SEARCH_TIMEOUT_MS = int(os.getenv("SEARCH_TIMEOUT_MS", 2000))
+
+SEARCHABLE_MODELS = (Message, ArchivedMessage)
+
+class SearchUnavailableError(Exception):
+    """The database has no full-text search support wired up"""
+    def __init__(self, dialect: str):
+        super().__init__(f"Full-text search is not supported on {dialect}")
+        self.dialect = dialect
+
+class SearchTimeoutError(Exception):
+    """The database cancelled a search that ran past SEARCH_TIMEOUT_MS"""
+    pass
+
+def fts_table(model: Type[MessageColumns]) -> str:
+    """Name of the FTS5 index for a message table on SQLite"""
+    return f"{model.__tablename__}_fts"
+
+def has_search_terms(terms: str) -> bool:
+    """Whether a query has anything to match; punctuation alone matches nothing"""
+    return re.search(r"\w", terms) is not None
+
+def fts5_query(terms: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every word, so user input can never
+    be an FTS5 syntax error. Postgres gets the same behaviour from websearch_to_tsquery.
+    """
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", terms))
+
+async def create_search_indexes(conn: AsyncConnection) -> None:
+    """
+    Add full-text indexes to the message tables if they are missing.
+
+    Postgres: a generated tsvector column with a GIN index; existing rows are filled in
+    by the ALTER. SQLite: an external-content FTS5 table kept in step by triggers, built
+    from the existing rows when first created. Other databases get no search.
+    """
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        if not re.fullmatch(r"\w+", SEARCH_LANGUAGE):
+            raise ValueError(f"Invalid SEARCH_LANGUAGE: {SEARCH_LANGUAGE}")
+        for model in SEARCHABLE_MODELS:
+            name = model.__tablename__
+            await conn.execute(text(
+                f"ALTER TABLE {name} ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR} tsvector "
+                f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_LANGUAGE}'::regconfig, content)) STORED"
+            ))
+            await conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{name}_search ON {name} USING GIN ({SEARCH_VECTOR})"
+            ))
+    elif dialect == "sqlite":
+        for model in SEARCHABLE_MODELS:
+            name, fts = model.__tablename__, fts_table(model)
+            exists = await conn.scalar(
+                text("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+            )
+            # Indexed by rowid, which VACUUM can renumber on these tables;
+            # run INSERT INTO <fts>(<fts>) VALUES ('rebuild') after one
+            await conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"content, content='{name}', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')"
+            ))
+            await conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {name} BEGIN "
+                f"INSERT INTO {fts}(rowid, content) VALUES (new.rowid, new.content); END"
+            ))
+            await conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {name} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, content) VALUES ('delete', old.rowid, old.content); END"
+            ))
+            await conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF content ON {name} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, content) VALUES ('delete', old.rowid, old.content); "
+                f"INSERT INTO {fts}(rowid, content) VALUES (new.rowid, new.content); END"
+            ))
+            if not exists:
+                await conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+    else:
+        logger.warning(f"Full-text search is not supported on {dialect}; message search is disabled")
+
+def search_statement(model: Type[MessageColumns], dialect: str, terms: str) -> Tuple[Select, ColumnElement]:
+    """
+    Build a SELECT of (message, score) for messages in one table matching terms.
+
+    Args:
+        model: Message or ArchivedMessage
+        dialect: Name of the database dialect
+        terms: Free text from the user
+    Returns:
+        The statement and its score expression. Higher scores rank first on every database.
+    Raises:
+        SearchUnavailableError: If the dialect has no search support
+    """
+    name = model.__tablename__
+    if dialect == "postgresql":
+        vector = literal_column(f"{name}.{SEARCH_VECTOR}")
+        query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_LANGUAGE}'::regconfig"), terms)
+        score = func.ts_rank_cd(vector, query)
+        return select(model, score.label("score")).where(vector.op("@@")(query)), score
+    if dialect == "sqlite":
+        fts = table(fts_table(model), column("rowid"))
+        # bm25() ranks better matches lower, so flip it
+        score = -func.bm25(literal_column(fts.name))
+        statement = (
+            select(model, score.label("score"))
+            .join(fts, fts.c.rowid == literal_column(f"{name}.rowid"))
+            .where(literal_column(fts.name).op("MATCH")(fts5_query(terms)))
+        )
+        return statement, score
+    raise SearchUnavailableError(dialect)
+
+def search_timeout_statement(dialect: str) -> Optional[Select]:
+    """
+    Statement that caps every following statement in the transaction at SEARCH_TIMEOUT_MS,
+    or None where the database has no such setting (SQLite, used locally, runs unbounded).
+    """
+    if dialect == "postgresql":
+        # set_config(..., true) is SET LOCAL: it lasts until the transaction ends, or until
+        # search_timeout_reset_statement runs
+        return select(func.set_config("statement_timeout", str(SEARCH_TIMEOUT_MS), True))
+    return None
+
+def search_timeout_reset_statement(dialect: str) -> Optional[Executable]:
+    """
+    Statement that lifts search_timeout_statement's cap, so the rest of the request's
+    transaction runs under the normal statement_timeout again. None where there is no cap.
+    """
+    if dialect == "postgresql":
+        # Back to the connection's own value (server, role or connect options)
+        return text("SET LOCAL statement_timeout TO DEFAULT")
+    return None
@@ -4,6 +4,8 @@ from pydantic import BaseModel
 import uuid
 from enum import Enum
 
+from app.logging.context import get_request_id
+
 class ErrorCode(str, Enum):
     """
     Enumeration of possible error codes.
@@ -49,6 +51,7 @@ async def api_exception_handler(request: Request, exc: APIException):
         code=exc.code,
         message=exc.message,
         details=exc.details,
-        request_id=request.headers.get("X-Request-ID", str(uuid.uuid4()))
+        # The ID RequestIDMiddleware assigned, so the error matches the X-Request-ID header and the logs
+        request_id=get_request_id() or request.headers.get("X-Request-ID", str(uuid.uuid4()))
     )
     return JSONResponse(status_code=exc.status_code, content={"error": error.dict()})
\ No newline at end of file
@@ -8,10 +8,15 @@ from .factory import LoggerFactory
 from .base import BaseLogger
 from .json_logger import JsonLogger
 from .standard import StandardLogger
+from .filters import RequestIDFilter
+from .context import get_request_id, request_id_var
 
 __all__ = [
     'LoggerFactory',
     'BaseLogger', 
     'JsonLogger',
-    'StandardLogger'
+    'StandardLogger',
+    'RequestIDFilter',
+    'get_request_id',
+    'request_id_var'
 ]
\ No newline at end of file
@@ -9,6 +9,9 @@ from abc import ABC, abstractmethod
 import logging
 from typing import Any
 
+from .config import LOGGING_CONFIG
+from .queue_handler import AsyncLogPipeline
+
 
 class BaseLogger(ABC):
     """
@@ -18,14 +21,16 @@ class BaseLogger(ABC):
     and can be used interchangeably through the factory pattern.
     """
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, async_mode: bool = False):
         """
         Initialize the base logger.
         
         Args:
             name: The name of the logger
+            async_mode: Write records from a background thread through a bounded queue
         """
         self.name = name
+        self.async_mode = async_mode
         self._logger: logging.Logger = None
     
     @abstractmethod
@@ -38,6 +43,21 @@ class BaseLogger(ABC):
         """
         pass
     
+    def attach_handler(self, logger: logging.Logger, handler: logging.Handler) -> None:
+        """
+        Attach a configured handler, behind a queue and listener thread in async mode.
+        
+        Args:
+            logger: The logger to attach to
+            handler: The handler that formats and writes records
+        """
+        if self.async_mode:
+            AsyncLogPipeline.attach(
+                logger, handler, LOGGING_CONFIG["QUEUE_SIZE"], LOGGING_CONFIG["OVERFLOW_POLICY"]
+            )
+        else:
+            logger.addHandler(handler)
+    
     @property
     def logger(self) -> logging.Logger:
         """
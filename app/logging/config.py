@@ -4,4 +4,9 @@ import os
 LOGGING_CONFIG = {
     "DEFAULT_LOG_LEVEL": os.environ.get("LOG_LEVEL", "INFO"),
     "DEFAULT_LOG_FORMAT": os.environ.get("LOG_FORMAT", "%(asctime)s - %(name)s - %(levelname)s - %(message)s"),
-}
\ No newline at end of file
+    # Hand records to a background thread instead of writing them on the calling thread
+    "ASYNC": os.environ.get("LOG_ASYNC", "false").lower() == "true",
+    "QUEUE_SIZE": int(os.environ.get("LOG_QUEUE_SIZE", 10000)),
+    # What to do when the queue is full: "drop" (counted) or "block"
+    "OVERFLOW_POLICY": os.environ.get("LOG_OVERFLOW_POLICY", "drop"),
+}
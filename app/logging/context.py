@@ -0,0 +1,22 @@
+"""
+Per-request logging context.
+
+Values set here follow the current request through every await and task it
+spawns, so log records can pick them up without callers passing them along.
+"""
+
+from contextvars import ContextVar
+from typing import Optional
+
+# Set by RequestIDMiddleware for the duration of each request
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    """
+    Get the ID of the request being handled, if any.
+
+    Returns:
+        Optional[str]: The request ID, or None outside a request
+    """
+    return request_id_var.get()
@@ -1,27 +1,32 @@
 from .json_logger import JsonLogger
 from .standard import StandardLogger
 from .base import BaseLogger
+from .config import LOGGING_CONFIG
+from .queue_handler import AsyncLogPipeline
 
 class LoggerFactory:
     """
     Factory class for creating loggers with a specific name.
     """
     @classmethod
-    def create_logger(cls, name: str, logger_type: str = "standard") -> BaseLogger:
+    def create_logger(cls, name: str, logger_type: str = "standard", async_mode: bool = None) -> BaseLogger:
         """
         Create a logger instance based on the specified type.
         
         Args:
             name: The name of the logger
             logger_type: The type of logger to create ("standard" or "json")
+            async_mode: Format and write records on a background thread. Defaults to LOG_ASYNC
         
         Returns:
             BaseLogger: An instance of the specified logger type
         """
+        if async_mode is None:
+            async_mode = LOGGING_CONFIG["ASYNC"]
         if logger_type == "json":
-            logger_instance = JsonLogger(name)
+            logger_instance = JsonLogger(name, async_mode)
         elif logger_type == "standard":
-            logger_instance = StandardLogger(name)
+            logger_instance = StandardLogger(name, async_mode)
         else:
             raise ValueError(f"Unknown logger type: {logger_type}")
         
@@ -29,4 +34,16 @@ class LoggerFactory:
         logger_instance.setup()
         return logger_instance
 
-    
\ No newline at end of file
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Flush records still queued by async loggers and stop their threads.
+        """
+        AsyncLogPipeline.stop()
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """
+        Queue depth and dropped record count for async loggers.
+        """
+        return AsyncLogPipeline.get_stats()
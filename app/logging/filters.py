@@ -0,0 +1,15 @@
+import logging
+
+from .context import get_request_id
+
+class RequestIDFilter(logging.Filter):
+    """
+    Adds the current request ID to every record as `request_id`.
+    Records logged outside a request, or that already carry one, are left alone.
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            request_id = get_request_id()
+            if request_id is not None:
+                record.request_id = request_id
+        return True
@@ -1,5 +1,11 @@
 import logging
 import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 from .config import LOGGING_CONFIG
 
 class StandardFormatter(logging.Formatter):
@@ -29,4 +35,12 @@ class JsonFormatter(logging.Formatter):
             if key not in self.reserved_attrs:
                 log_record[key] = value
        
-        return json.dumps(log_record)
\ No newline at end of file
+        # Extras are not guaranteed to be JSON types, so anything else is logged as its str()
+        if orjson is not None:
+            try:
+                return orjson.dumps(log_record, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+            except TypeError:
+                # e.g. integers beyond 64 bits, which the standard library still handles
+                pass
+        # Keys json cannot write either (e.g. tuples) are left out rather than losing the record
+        return json.dumps(log_record, default=str, skipkeys=True)
\ No newline at end of file
@@ -2,6 +2,7 @@ import logging
 
 from .base import BaseLogger
 from .formatters import JsonFormatter
+from .filters import RequestIDFilter
 from .config import LOGGING_CONFIG
 
 class JsonLogger(BaseLogger):
@@ -9,8 +10,8 @@ class JsonLogger(BaseLogger):
     JSON logger implementation that formats logs as JSON objects.
     This logger can be configured to log messages in a JSON format.
     """
-    def __init__(self, name: str):
-        super().__init__(name)
+    def __init__(self, name: str, async_mode: bool = False):
+        super().__init__(name, async_mode)
     
     def setup(self) -> logging.Logger:
         logger = logging.getLogger(self.name)
@@ -19,7 +20,9 @@ class JsonLogger(BaseLogger):
         if not logger.handlers:
             handler = logging.StreamHandler()
             handler.setFormatter(JsonFormatter())
-            logger.addHandler(handler)
+            # On the handler, so records from child loggers get it too
+            handler.addFilter(RequestIDFilter())
+            self.attach_handler(logger, handler)
             logger.setLevel(LOGGING_CONFIG.get("DEFAULT_LOG_LEVEL", "INFO"))
         
         return logger
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Non-blocking log delivery.
+
+Records are put on a bounded queue by the logging call and formatted and
+written by a QueueListener thread, so the event loop never waits on
+formatting or on the output stream.
+"""
+
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Tuple
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler with a bounded queue and a policy for when it is full.
+
+    "drop" discards the record and counts it, so a slow stream can never stall
+    the caller; "block" waits for room, trading latency for completeness.
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow_policy: str = "drop"):
+        super().__init__(log_queue)
+        if overflow_policy not in ("drop", "block"):
+            raise ValueError(f"Unknown log overflow policy: {overflow_policy}")
+        self.overflow_policy = overflow_policy
+        self.dropped_records = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow_policy == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_records += 1
+
+
+class AsyncLogPipeline:
+    """
+    Owns the queue handlers and listener threads created by LoggerFactory.
+    """
+    handlers: List[BoundedQueueHandler] = []
+    listeners: List[QueueListener] = []
+    # (logger, queue handler, wrapped handler), to put the wrapped handlers back on stop
+    _attached: List[Tuple[logging.Logger, BoundedQueueHandler, logging.Handler]] = []
+
+    @classmethod
+    def attach(cls, logger: logging.Logger, handler: logging.Handler, queue_size: int, overflow_policy: str) -> BoundedQueueHandler:
+        """
+        Attach a handler to a logger behind a queue, with a listener thread feeding it.
+
+        Args:
+            logger: The logger to attach to
+            handler: The handler that formats and writes records
+            queue_size: Maximum number of records waiting to be written
+            overflow_policy: "drop" or "block"
+
+        Returns:
+            BoundedQueueHandler: The handler attached to the logger in its place
+        """
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        queue_handler = BoundedQueueHandler(log_queue, overflow_policy)
+        # Filters that read request context must run on the logging thread, not the listener's
+        for log_filter in handler.filters:
+            queue_handler.addFilter(log_filter)
+        listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        logger.addHandler(queue_handler)
+        cls.handlers.append(queue_handler)
+        cls.listeners.append(listener)
+        cls._attached.append((logger, queue_handler, handler))
+        return queue_handler
+
+    @classmethod
+    def stop(cls) -> None:
+        """
+        Flush every queued record and stop the listener threads.
+
+        Loggers get their original handlers back first, so records logged after
+        shutdown are written directly instead of filling a queue nothing drains.
+        """
+        for logger, queue_handler, handler in cls._attached:
+            logger.removeHandler(queue_handler)
+            logger.addHandler(handler)
+        for listener in cls.listeners:
+            listener.stop()
+        cls._attached = []
+        cls.handlers = []
+        cls.listeners = []
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """
+        Returns:
+            dict: Records waiting to be written and records dropped on overflow
+        """
+        return {
+            "enabled": bool(cls.handlers),
+            "queued_records": sum(handler.queue.qsize() for handler in cls.handlers),
+            "dropped_records": sum(handler.dropped_records for handler in cls.handlers),
+        }
@@ -2,6 +2,7 @@ import logging
 
 from .base import BaseLogger
 from .formatters import StandardFormatter
+from .filters import RequestIDFilter
 from .config import LOGGING_CONFIG
 
 class StandardLogger(BaseLogger):
@@ -9,8 +10,8 @@ class StandardLogger(BaseLogger):
     Standard logger implementation that uses Python's built-in logging module.
     This logger can be configured to log messages in a standard format.
     """
-    def __init__(self, name: str):
-        super().__init__(name)
+    def __init__(self, name: str, async_mode: bool = False):
+        super().__init__(name, async_mode)
     
     def setup(self) -> logging.Logger:
         logger = logging.getLogger(self.name)
@@ -19,7 +20,9 @@ class StandardLogger(BaseLogger):
         if not logger.handlers:
             handler = logging.StreamHandler()
             handler.setFormatter(StandardFormatter())
-            logger.addHandler(handler)
+            # On the handler, so records from child loggers get it too
+            handler.addFilter(RequestIDFilter())
+            self.attach_handler(logger, handler)
             logger.setLevel(LOGGING_CONFIG.get("DEFAULT_LOG_LEVEL", "INFO"))
         
         return logger
\ No newline at end of file
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Depends
-from app.db import SessionLocal
+from app.db import SessionLocal, engine
+from app.db.routing import read_router
 from app.db.init_db import create_tables, init_db
 from fastapi.middleware.cors import CORSMiddleware
 from app.logging import LoggerFactory
@@ -11,14 +12,18 @@ from app.api import health
 from app.api import users
 from app.api import auth
 from app.api import conversation
-from app.services.user_service import UserService
-from app.services.conversation_service import ConversationService
-from app.services.message_service import MessageService 
+from app.api import metrics
 from app.websocket import router as websocket_router
 from app.websocket.connection_manager import ConnectionManager
+from app.websocket.backends import BroadcastBackendFactory
+from app.services.message_ingestor import MessageIngestor
+from app.services.message_archiver import MessageArchiver
+from app.security.password_security import password_hasher
+from app.security.token_cache import invalidate_user_tokens
 from app.error.error import api_exception_handler, APIException
 from app.middleware.sanity import RequestIDMiddleware
-from app.db import SessionLocal
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
 from app.db.redis_client import RedisClient
 from app.utils.cache import Cache
 from app.db.init_db import create_tables, init_db
@@ -40,50 +45,62 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "X-Next-Cursor", "X-Prev-Cursor", "X-DB-Queries", "X-DB-Rows", "X-DB-Time-Ms"],
 )
 
 # Include error handler
 app.add_exception_handler(APIException, api_exception_handler)
 
 # Include middleware
+app.add_middleware(QueryStatsMiddleware)
 app.add_middleware(RequestIDMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(health.router)
+app.include_router(metrics.router)
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(conversation.router)
 app.include_router(websocket_router)
 
-# Initialize database
-create_tables()
-
-# Initialize database for first run
-db = SessionLocal()
-try:
-    init_db(db)
-finally:
-    db.close()
-
-# Initialize services and store in app.state
-# This ensures they're available throughout the application
-db_for_services = SessionLocal()
+# Initialize shared clients and store in app.state
+# Services are built per request around their own database session (see app.services.dependencies)
 redis_client = RedisClient()
 cache = Cache(redis_client)
-user_service = UserService(db_for_services, cache)
-app.state.user_service = user_service
-app.state.conversation_service = ConversationService(user_service, db_for_services)
-app.state.message_service = MessageService(db_for_services)
-app.state.connection_manager = ConnectionManager()
+cache.add_invalidation_listener(invalidate_user_tokens)
+app.state.connection_manager = ConnectionManager(BroadcastBackendFactory.create_backend(redis_client=redis_client))
+app.state.message_ingestor = MessageIngestor(SessionLocal)
+app.state.message_archiver = MessageArchiver(SessionLocal)
 app.state.redis_client = redis_client
 app.state.cache = cache
 
 
-# Create a shutdown event to close the database connection
+# Create tables and run first-run setup once the event loop is available
+@app.on_event("startup")
+async def startup_db_client():
+    await cache.connect()
+    await create_tables()
+    async with SessionLocal() as db:
+        await init_db(db)
+    await app.state.message_ingestor.start()
+    await app.state.message_archiver.start()
+    await app.state.connection_manager.start()
+
+# Create a shutdown event to close the database connections
 @app.on_event("shutdown")
-def shutdown_db_client():
-    db_for_services.close()
-    redis_client.close()
+async def shutdown_db_client():
+    await app.state.connection_manager.stop()
+    # Drain queued messages before the engine goes away
+    await app.state.message_ingestor.stop()
+    await app.state.message_archiver.stop()
+    await engine.dispose()
+    await read_router.dispose()
+    await cache.close()
+    await redis_client.close()
+    password_hasher.shutdown()
+    # Last, so records logged during shutdown are written
+    LoggerFactory.shutdown()
 
 @app.get("/")
 async def root():
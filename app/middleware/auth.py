@@ -1,20 +1,31 @@
-from fastapi import HTTPException, Header, Request
+from fastapi import Depends, HTTPException, Header
 from dotenv import load_dotenv
 from typing import Optional
 import logging
 
 from app.models.user import User
+from app.services.dependencies import get_user_service
+from app.services.user_service import UserService
 from ..security.jwt_handler import decode_access_token
+from ..security.token_cache import token_cache
 
 load_dotenv()
 logger = logging.getLogger("main.middleware.auth")
 
-async def get_current_user(request: Request, authorization: Optional[str] = Header(None)) -> User:
+async def get_current_user(
+    authorization: Optional[str] = Header(None),
+    service: UserService = Depends(get_user_service)
+) -> User:
     if not authorization or not authorization.lower().startswith("bearer "):
         logger.warning("Missing or invalid Authorization header format")
         raise HTTPException(status_code=401, detail="Missing Bearer token")
     
     token = authorization.split()[1]
+    # Skip signature verification and the user lookup for tokens seen recently
+    cached_user = token_cache.get(token)
+    if cached_user:
+        return cached_user
+
     logger.debug(f"Attempting to validate token")
     payload = decode_access_token(token)
     
@@ -28,12 +39,12 @@ async def get_current_user(request: Request, authorization: Optional[str] = Head
         raise HTTPException(status_code=401, detail="Invalid token payload")
     
     logger.debug(f"Looking up user: {user_id}")
-    service = request.app.state.user_service
-    user = service.get_user_by_id(user_id)
+    user = await service.get_user_by_id(user_id)
     
     if not user:
         logger.warning(f"User not found: {user_id}")
         raise HTTPException(status_code=401, detail="User not found")
     
+    token_cache.set(token, payload, user)
     logger.debug(f"User authenticated: {user_id}")
     return user
\ No newline at end of file
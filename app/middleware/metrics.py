@@ -0,0 +1,34 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import time
+
+from app.utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+class MetricsMiddleware:
+    """
+    Records latency and status of every HTTP request, labelled with the matched
+    route template (e.g. /v1/conversations/{conversation_id}/messages) rather than
+    the raw path. Requests that match no route share the "unmatched" label.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched route on the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method=scope["method"], route=route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method=scope["method"], route=route, status=str(status_code)).inc()
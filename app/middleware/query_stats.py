@@ -0,0 +1,51 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import logging
+import os
+
+from app.db.query_stats import QueryStats, query_stats_var
+
+logger = logging.getLogger("main.middleware.query_stats")
+
+# Adds X-DB-Queries, X-DB-Rows and X-DB-Time-Ms to every response. Meant for development
+QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", "false").lower() == "true"
+# Requests running more statements than this are logged as warnings, the rest at debug level
+QUERY_STATS_WARN_THRESHOLD = int(os.getenv("QUERY_STATS_WARN_THRESHOLD", 20))
+
+class QueryStatsMiddleware:
+    """
+    Counts the SQL statements, rows and database time spent on each HTTP request.
+
+    Totals come from the engine events in app.utils.metrics, which add to the
+    QueryStats this middleware puts in a ContextVar. They are logged per request
+    and, with QUERY_STATS_HEADERS enabled, returned as response headers.
+    """
+    def __init__(self, app: ASGIApp, headers: bool = None, warn_threshold: int = None):
+        self.app = app
+        self.headers = QUERY_STATS_HEADERS if headers is None else headers
+        self.warn_threshold = warn_threshold or QUERY_STATS_WARN_THRESHOLD
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        async def send_with_stats(message: Message):
+            # Statements run after the response starts (e.g. streaming) are logged but miss the headers
+            if self.headers and message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.queries)
+                headers["X-DB-Rows"] = str(stats.rows)
+                headers["X-DB-Time-Ms"] = f"{stats.db_time * 1000:.2f}"
+            await send(message)
+
+        token = query_stats_var.set(stats)
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            query_stats_var.reset(token)
+            route = getattr(scope.get("route"), "path", scope["path"])
+            level = logging.WARNING if stats.queries > self.warn_threshold else logging.DEBUG
+            logger.log(level, f"SQL for {scope['method']} {route}: {stats.queries} queries",
+                       extra={"method": scope["method"], "route": route, **stats.to_dict()})
@@ -1,18 +1,37 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import uuid
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Use client-supplied request_id if present, else generate new
-        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+from app.logging.context import request_id_var
+
+class RequestIDMiddleware:
+    """
+    Tags every request with an ID, echoed in the X-Request-ID response header.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so there is no extra task or
+    response stream per request. The ID is stored in a ContextVar that logging
+    picks up automatically, and in request.state.request_id.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        # Store in request.state so routes/handlers can use it
-        request.state.request_id = request_id
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        # Use client-supplied request_id if present, else generate new
+        request_id = Headers(scope=scope).get("X-Request-ID") or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
 
-        # Continue processing request
-        response = await call_next(request)
+        async def send_with_request_id(message: Message):
+            # Attach request_id to response headers
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
 
-        # Attach request_id to response headers
-        response.headers["X-Request-ID"] = request_id
-        return response
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -1,5 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 from app.models.user import User, UserResponse
@@ -37,6 +38,12 @@ class Message:
            "timestamp": self.timestamp,
        }
 
+@dataclass
+class MessagePage:
+    messages: List[Message] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
 class MessageCreateRequest(BaseModel):
     content: str = Field(..., min_length=1, max_length=200, description="Message content")
     type: MessageType = MessageType.TEXT
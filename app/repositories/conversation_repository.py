@@ -1,61 +1,118 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Set
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 import time
 
+from app.db.routing import execute_read
 from app.db.models.conversation import Conversation, conversation_members
 from app.db.models.user import User
 from app.models.conversation import CreateConversationRequest, ConversationType
 
+class UnknownMembersError(Exception):
+    """
+    Raised when a conversation is created with member IDs that match no user.
+    """
+    def __init__(self, member_ids: List[str]):
+        super().__init__(f"Unknown member IDs: {', '.join(member_ids)}")
+        self.member_ids = member_ids
+
 class ConversationRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def create(self, request: CreateConversationRequest, creator_id: str) -> Conversation:
-        """Create a new conversation"""
+    async def create(self, request: CreateConversationRequest, creator_id: str) -> Conversation:
+        """
+        Create a new conversation, with its creator and members loaded.
+        Raises UnknownMembersError, before writing anything, if any member ID matches no user
+        """
         # Determine conversation type based on number of members
         conversation_type = ConversationType.GROUP if len(request.member_ids) > 1 else ConversationType.ONE_ON_ONE
         
-        # Create conversation
+        # Add creator and members to the conversation
+        member_ids = set(request.member_ids)
+        member_ids.add(creator_id)  # Ensure creator is also a member
+        
+        # Resolve every member in one IN query, however large the group. On the primary:
+        # a user who registered a moment ago may not have reached the replicas yet
+        result = await self.db.execute(select(User.id).filter(User.id.in_(member_ids)))
+        known_ids = {str(user_id) for user_id in result.scalars().all()}
+        unknown_ids = member_ids - known_ids
+        if unknown_ids:
+            raise UnknownMembersError(sorted(unknown_ids))
+        
         db_conversation = Conversation(
             name=request.name,
             creator_id=creator_id,
             created_at=time.time(),
             type=conversation_type
         )
-        
         self.db.add(db_conversation)
-        self.db.flush()  # Flush to get the ID
-        
-        # Add creator and members to the conversation
-        member_ids = set(request.member_ids)
-        member_ids.add(creator_id)  # Ensure creator is also a member
-        
-        for member_id in member_ids:
-            # Get the user object
-            user = self.db.query(User).filter(User.id == member_id).first()
-            if user:
-                db_conversation.members.append(user)
-        
-        self.db.commit()
-        self.db.refresh(db_conversation)
-        return db_conversation
+        await self.db.flush()
+
+        # Memberships go in as one multi-row insert rather than through the relationship collection
+        await self.db.execute(
+            insert(conversation_members).values([
+                {"conversation_id": db_conversation.id, "user_id": member_id} for member_id in sorted(known_ids)
+            ])
+        )
+        await self.db.commit()
+        return await self.get_by_id(db_conversation.id)
     
-    def get_by_id(self, conversation_id: str) -> Optional[Conversation]:
-        """Get a conversation by ID"""
-        return self.db.query(Conversation).filter(Conversation.id == conversation_id).first()
+    async def get_by_id(self, conversation_id: str, with_members: bool = True) -> Optional[Conversation]:
+        """Get a conversation by ID, with its creator and, unless with_members is False, its members loaded"""
+        options = [joinedload(Conversation.creator)]
+        if with_members:
+            options.append(selectinload(Conversation.members))
+        result = await execute_read(
+            self.db,
+            select(Conversation)
+            .options(*options)
+            .filter(Conversation.id == conversation_id)
+        )
+        return result.scalars().first()
     
-    def get_user_conversations(self, user_id: str) -> List[Conversation]:
-        """Get all conversations for a user"""
-        # This query gets conversations where the user is a member
-        return (self.db.query(Conversation)
-                .join(conversation_members)
-                .filter(conversation_members.c.user_id == user_id)
-                .all())
+    async def get_by_ids(self, conversation_ids: List[str]) -> List[Conversation]:
+        """Get several conversations by ID in one IN query, with creators joined and members in one more"""
+        if not conversation_ids:
+            return []
+        result = await execute_read(
+            self.db,
+            select(Conversation)
+            .options(joinedload(Conversation.creator), selectinload(Conversation.members))
+            .filter(Conversation.id.in_(conversation_ids))
+        )
+        return list(result.scalars().all())
     
-    def check_user_access(self, user_id: str, conversation_id: str) -> bool:
+    async def get_user_conversations(self, user_id: str) -> List[Conversation]:
+        """Get all conversations for a user, with their creators and members loaded"""
+        # Conversations where the user is a member, creator joined in; members come in one more
+        # IN query for the whole list, so the query count does not grow with the number of conversations
+        result = await execute_read(
+            self.db,
+            select(Conversation)
+            .join(conversation_members)
+            .filter(conversation_members.c.user_id == user_id)
+            .options(joinedload(Conversation.creator), selectinload(Conversation.members))
+        )
+        return list(result.scalars().all())
+    
+    async def check_user_access(self, user_id: str, conversation_id: str) -> bool:
         """Check if a user has access to a conversation"""
-        count = (self.db.query(conversation_members)
-                .filter(conversation_members.c.conversation_id == conversation_id, 
-                        conversation_members.c.user_id == user_id)
-                .count())
-        return count > 0
+        result = await execute_read(
+            self.db,
+            select(func.count())
+            .select_from(conversation_members)
+            .filter(conversation_members.c.conversation_id == conversation_id, 
+                    conversation_members.c.user_id == user_id)
+        )
+        return result.scalar() > 0
+    
+    async def get_member_ids(self, conversation_id: str) -> Set[str]:
+        """Get the IDs of every member of a conversation"""
+        result = await execute_read(
+            self.db,
+            select(conversation_members.c.user_id)
+            .filter(conversation_members.c.conversation_id == conversation_id)
+        )
+        return {str(user_id) for user_id in result.scalars().all()}
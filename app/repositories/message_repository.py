@@ -1,18 +1,41 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from typing import List, Optional, Tuple, Type
+from sqlalchemy import asc, delete, desc, insert, select, tuple_, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+import os
 import time
+import uuid
 
-from app.db.models.message import Message
+from app.db.routing import execute_read, execute_reads, is_statement_timeout
+from app.db.search import (
+    SEARCHABLE_MODELS, SearchTimeoutError, has_search_terms, search_statement,
+    search_timeout_reset_statement, search_timeout_statement
+)
+from app.db.models.conversation import Conversation, conversation_members
+from app.db.models.message import ArchivedMessage, Message, MessageColumns
 from app.models.message import MessageCreateRequest, MessageDeliveryStatus, MessageType
 
+# Messages older than this many days are moved from messages to messages_archive.
+# Paging relies on the archive holding only rows older than this, so lower it freely
+# but only raise it after the archive has been emptied back into messages. 0 or less
+# turns archiving off and history is read from messages alone, so empty the archive first
+MESSAGE_ARCHIVE_AFTER_DAYS = float(os.getenv("MESSAGE_ARCHIVE_AFTER_DAYS", 90))
+
+def archive_horizon() -> Optional[float]:
+    """Timestamp before which messages may have been archived, or None with archiving off"""
+    if MESSAGE_ARCHIVE_AFTER_DAYS <= 0:
+        return None
+    return time.time() - MESSAGE_ARCHIVE_AFTER_DAYS * 86400
+
 class MessageRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def create(self, request: MessageCreateRequest, sender_id: str) -> Message:
-        """Create a new message"""
-        db_message = Message(
+    @staticmethod
+    def new_message(request: MessageCreateRequest, sender_id: str) -> Message:
+        """Build a message with its ID and timestamp assigned, without persisting it"""
+        return Message(
+            id=str(uuid.uuid4()),
             sender_id=sender_id,
             conversation_id=request.conversation_id,
             content=request.content,
@@ -20,44 +43,260 @@ class MessageRepository:
             type=request.type or MessageType.TEXT,
             status=MessageDeliveryStatus.PENDING
         )
+    
+    async def create(self, request: MessageCreateRequest, sender_id: str) -> Message:
+        """Create a new message"""
+        db_message = self.new_message(request, sender_id)
         
         self.db.add(db_message)
-        self.db.commit()
-        self.db.refresh(db_message)
+        await self.db.commit()
+        await self.db.refresh(db_message)
         return db_message
     
-    def get_by_id(self, message_id: str) -> Optional[Message]:
-        """Get a message by ID"""
-        return self.db.query(Message).filter(Message.id == message_id).first()
+    async def create_many(self, messages: List[Message]) -> None:
+        """Persist already-built messages with a single multi-row INSERT in one transaction"""
+        if not messages:
+            return
+        await self.db.execute(insert(Message).values([
+            {
+                "id": message.id,
+                "sender_id": message.sender_id,
+                "conversation_id": message.conversation_id,
+                "content": message.content,
+                "timestamp": message.timestamp,
+                "type": message.type,
+                "status": message.status
+            }
+            for message in messages
+        ]))
+        await self.db.commit()
+    
+    async def get_by_id(self, message_id: str) -> Optional[MessageColumns]:
+        """Get a message by ID, from the archive if it has been moved there"""
+        for model in (Message, ArchivedMessage):
+            result = await execute_read(self.db, select(model).filter(model.id == message_id))
+            message = result.scalars().first()
+            if message is not None:
+                return message
+        return None
+    
+    async def get_conversation_messages(
+        self,
+        conversation_id: str,
+        limit: int = 50,
+        before_timestamp: Optional[float] = None,
+        before: Optional[Tuple[float, str]] = None,
+        after: Optional[Tuple[float, str]] = None
+    ) -> List[MessageColumns]:
+        """
+        Get messages for a conversation with optional pagination.
+
+        before/after are (timestamp, id) keyset positions. Messages strictly older than
+        `before` come back newest first; messages strictly newer than `after` come back
+        oldest first. Both forms are range scans on ix_messages_conversation_timestamp_id.
+
+        Pages run across the hot table and the archive as one history, merged in (timestamp, id)
+        order. Everything archived is older than archive_horizon(), so the archive is only read
+        when a page reaches past the horizon in a conversation that is older than it, and
+        never with archiving off.
+        """
+        horizon = archive_horizon()
+        messages = await self._fetch_page(Message, conversation_id, limit, before_timestamp, before, after)
+
+        if horizon is None:
+            return messages
+        if after:
+            # Oldest first: archived rows can only come before a position older than the horizon
+            if after[0] >= horizon:
+                return messages
+        elif len(messages) == limit:
+            # Newest first: a full page that stays above the horizon cannot interleave with the archive
+            if messages[-1].timestamp >= horizon:
+                return messages
+        elif await self._created_after(conversation_id, horizon):
+            # The hot table ran out, but the conversation is too new to have archived messages
+            return messages
+
+        # Archivers on several workers can move batches out of order, so merge rather than append
+        messages += await self._fetch_page(ArchivedMessage, conversation_id, limit, before_timestamp, before, after)
+        messages.sort(key=lambda message: (message.timestamp, message.id), reverse=not after)
+        return messages[:limit]
+    
+    async def _created_after(self, conversation_id: str, horizon: float) -> bool:
+        """Whether a conversation started after horizon, so none of its messages are archived"""
+        result = await execute_read(
+            self.db, select(Conversation.created_at).filter(Conversation.id == conversation_id)
+        )
+        created_at = result.scalar()
+        return created_at is None or created_at >= horizon
     
-    def get_conversation_messages(self, conversation_id: str, limit: int = 50, before_timestamp: Optional[float] = None) -> List[Message]:
-        """Get messages for a conversation with optional pagination"""
-        query = self.db.query(Message).filter(Message.conversation_id == conversation_id)
+    async def _fetch_page(
+        self,
+        model: Type[MessageColumns],
+        conversation_id: str,
+        limit: int,
+        before_timestamp: Optional[float],
+        before: Optional[Tuple[float, str]],
+        after: Optional[Tuple[float, str]]
+    ) -> List[MessageColumns]:
+        """One page from a single table, messages or messages_archive"""
+        query = select(model).filter(model.conversation_id == conversation_id)
         
         if before_timestamp:
-            query = query.filter(Message.timestamp < before_timestamp)
+            query = query.filter(model.timestamp < before_timestamp)
+
+        if before:
+            query = query.filter(tuple_(model.timestamp, model.id) < tuple_(*before))
+
+        if after:
+            query = query.filter(tuple_(model.timestamp, model.id) > tuple_(*after))
+            query = query.order_by(asc(model.timestamp), asc(model.id))
+        else:
+            query = query.order_by(desc(model.timestamp), desc(model.id))
         
-        return query.order_by(desc(Message.timestamp)).limit(limit).all()
+        result = await execute_read(self.db, query.limit(limit))
+        return list(result.scalars().all())
     
-    def update_status(self, message_ids: List[str], status: MessageDeliveryStatus) -> int:
+    async def search(
+        self,
+        terms: str,
+        limit: int = 20,
+        conversation_id: Optional[str] = None,
+        member_id: Optional[str] = None,
+        after: Optional[Tuple[float, float, str]] = None
+    ) -> List[Tuple[MessageColumns, float]]:
+        """
+        Full-text search over message content, best matches first.
+
+        Args:
+            terms: Free text; every word must match
+            limit: Maximum number of results
+            conversation_id: Only search this conversation
+            member_id: Only search conversations this user is a member of
+            after: (score, timestamp, id) keyset position of the last result already seen
+        Returns:
+            (message, score) pairs ordered by score, then newest first
+        Raises:
+            SearchUnavailableError: If the database has no full-text search support
+            SearchTimeoutError: If the database cancelled the search after SEARCH_TIMEOUT_MS
+        """
+        if not has_search_terms(terms):
+            return []
+        dialect = self.db.get_bind().dialect.name
+
+        searches = []
+        for model in SEARCHABLE_MODELS:
+            query, score = search_statement(model, dialect, terms)
+            if conversation_id:
+                query = query.filter(model.conversation_id == conversation_id)
+            if member_id:
+                query = query.filter(model.conversation_id.in_(
+                    select(conversation_members.c.conversation_id)
+                    .where(conversation_members.c.user_id == member_id)
+                ))
+            if after:
+                query = query.filter(tuple_(score, model.timestamp, model.id) < tuple_(*after))
+            searches.append(query.order_by(desc(score), desc(model.timestamp), desc(model.id)).limit(limit))
+
+        # The timeout, both table queries and the reset run on one connection, so the timeout
+        # covers the searches and nothing after them in the request's transaction
+        statements = searches
+        timeout = search_timeout_statement(dialect)
+        if timeout is not None:
+            statements = [timeout, *searches, search_timeout_reset_statement(dialect)]
+
+        try:
+            query_results = await execute_reads(self.db, statements)
+        except DBAPIError as e:
+            if is_statement_timeout(e):
+                raise SearchTimeoutError() from e
+            raise
+
+        # Each table's best matches merge into one order. ts_rank_cd scores every message on its
+        # own, so on Postgres the order is exact. SQLite's bm25() weighs terms by each FTS5 table's
+        # own statistics, so there hot and archived scores are only roughly comparable
+        results = []
+        first = 0 if timeout is None else 1
+        for result in query_results[first:first + len(searches)]:
+            results.extend((message, score) for message, score in result.all())
+        results.sort(key=lambda row: (row[1], row[0].timestamp, row[0].id), reverse=True)
+        return results[:limit]
+    
+    async def update_status(self, message_ids: List[str], status: MessageDeliveryStatus) -> int:
         """Update status for multiple messages"""
-        result = self.db.query(Message).filter(Message.id.in_(message_ids)).update(
-            {Message.status: status}, 
-            synchronize_session=False
+        result = await self.db.execute(
+            update(Message)
+            .where(Message.id.in_(message_ids))
+            .values(status=status)
+            .execution_options(synchronize_session=False)
         )
-        self.db.commit()
-        return result
+        updated = result.rowcount
+        if updated < len(set(message_ids)):
+            # The rest may already have been archived
+            result = await self.db.execute(
+                update(ArchivedMessage)
+                .where(ArchivedMessage.id.in_(message_ids))
+                .values(status=status)
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+        await self.db.commit()
+        return updated
     
-    def update_status_by_criteria(self, conversation_id: str, before_timestamp: Optional[float], sender_id: Optional[str], status: MessageDeliveryStatus) -> int:
-        """Update status for messages matching criteria"""
-        query = self.db.query(Message).filter(Message.conversation_id == conversation_id)
-        
-        if before_timestamp:
-            query = query.filter(Message.timestamp < before_timestamp)
-            
-        if sender_id:
-            query = query.filter(Message.sender_id == sender_id)
+    async def update_status_by_criteria(self, conversation_id: str, before_timestamp: Optional[float], sender_id: Optional[str], status: MessageDeliveryStatus) -> int:
+        """Update status for messages matching criteria, in the hot table and the archive"""
+        updated = 0
+        for model in (Message, ArchivedMessage):
+            query = update(model).where(model.conversation_id == conversation_id)
             
-        result = query.update({Message.status: status}, synchronize_session=False)
-        self.db.commit()
-        return result
+            if before_timestamp:
+                query = query.where(model.timestamp < before_timestamp)
+                
+            if sender_id:
+                query = query.where(model.sender_id == sender_id)
+
+            if model is ArchivedMessage:
+                # Archived messages have usually settled already; skip rewriting them
+                query = query.where(model.status != status)
+                
+            result = await self.db.execute(
+                query.values(status=status).execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+        await self.db.commit()
+        return updated
+    
+    async def archive_before(self, cutoff: float, batch_size: int) -> int:
+        """
+        Move up to batch_size of the oldest messages sent before cutoff into messages_archive,
+        copy and delete in one transaction.
+
+        Returns:
+            The number of messages moved
+        """
+        # SKIP LOCKED keeps archivers on several workers off each other's rows on Postgres
+        result = await self.db.execute(
+            select(Message.id)
+            .filter(Message.timestamp < cutoff)
+            .order_by(Message.timestamp)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        message_ids = list(result.scalars().all())
+        if not message_ids:
+            return 0
+
+        columns = [column.name for column in ArchivedMessage.__table__.columns]
+        await self.db.execute(
+            insert(ArchivedMessage).from_select(
+                columns,
+                select(*(Message.__table__.c[name] for name in columns)).where(Message.id.in_(message_ids))
+            )
+        )
+        await self.db.execute(
+            delete(Message)
+            .where(Message.id.in_(message_ids))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return len(message_ids)
@@ -1,14 +1,16 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.routing import execute_read
 from app.db.models.user import User
 from app.models.user import UserRegistrationRequest, UserStatus
 
 class UserRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def create(self, user_request: UserRegistrationRequest, hashed_password: str) -> User:
+    async def create(self, user_request: UserRegistrationRequest, hashed_password: str) -> User:
         """Create a new user in the database"""
         db_user = User(
             name=user_request.name,
@@ -17,27 +19,37 @@ class UserRepository:
             status=UserStatus.ONLINE
         )
         self.db.add(db_user)
-        self.db.commit()
-        self.db.refresh(db_user)
+        await self.db.commit()
+        await self.db.refresh(db_user)
         return db_user
     
-    def get_by_username(self, username: str) -> Optional[User]:
+    async def get_by_username(self, username: str) -> Optional[User]:
         """Get a user by username"""
-        return self.db.query(User).filter(User.username == username).first()
+        result = await execute_read(self.db, select(User).filter(User.username == username))
+        return result.scalars().first()
     
-    def get_by_id(self, user_id: str) -> Optional[User]:
+    async def get_by_id(self, user_id: str) -> Optional[User]:
         """Get a user by ID"""
-        return self.db.query(User).filter(User.id == user_id).first()
+        result = await execute_read(self.db, select(User).filter(User.id == user_id))
+        return result.scalars().first()
     
-    def get_all(self) -> List[User]:
+    async def get_by_ids(self, user_ids: List[str]) -> List[User]:
+        """Get every user whose ID is in user_ids with a single IN query"""
+        if not user_ids:
+            return []
+        result = await execute_read(self.db, select(User).filter(User.id.in_(user_ids)))
+        return list(result.scalars().all())
+    
+    async def get_all(self) -> List[User]:
         """Get all users"""
-        return self.db.query(User).all()
+        result = await execute_read(self.db, select(User))
+        return list(result.scalars().all())
     
-    def update_status(self, user_id: str, status: UserStatus) -> Optional[User]:
+    async def update_status(self, user_id: str, status: UserStatus) -> Optional[User]:
         """Update a user's status"""
-        user = self.get_by_id(user_id)
+        user = await self.get_by_id(user_id)
         if user:
             user.status = status
-            self.db.commit()
-            self.db.refresh(user)
+            await self.db.commit()
+            await self.db.refresh(user)
         return user
@@ -1,10 +1,106 @@
+import os
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
 from passlib.context import CryptContext
 
 # Setup password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a small thread pool hashes in parallel without touching the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Calls allowed to wait for a worker before new ones are rejected
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+class PasswordHasherOverloaded(Exception):
+    """
+    Raised when the hashing pool and its wait queue are both full.
+    """
+    pass
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated thread pool with bounded concurrency.
+
+    At most `workers` hashes run at once and at most `max_queue` more wait for a
+    worker. Anything beyond that fails fast with PasswordHasherOverloaded instead of
+    piling up behind a login burst.
+    """
+    def __init__(self, workers: int = None, max_queue: int = None):
+        self.workers = workers or PASSWORD_HASH_WORKERS
+        self.max_queue = PASSWORD_HASH_MAX_QUEUE if max_queue is None else max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queue_depth_seen = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for a free worker"""
+        return max(0, self.in_flight - self.workers)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth_seen": self.max_queue_depth_seen,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherOverloaded("Password hashing is overloaded, try again later")
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        self.max_queue_depth_seen = max(self.max_queue_depth_seen, self.queue_depth)
+        try:
+            future = self._executor.submit(fn, *args)
+        except RuntimeError:
+            # Executor already shut down
+            self.in_flight -= 1
+            raise
+        # The slot is held until the hash itself ends, even if the caller is cancelled
+        # while bcrypt is still running on its thread
+        future.add_done_callback(lambda done: self._release(loop, done))
+        return await asyncio.wrap_future(future)
+
+    def _release(self, loop: asyncio.AbstractEventLoop, future: Future) -> None:
+        # Runs on the worker thread; the counters belong to the event loop
+        try:
+            loop.call_soon_threadsafe(self._finish, future)
+        except RuntimeError:
+            pass  # Loop closed during shutdown
+
+    def _finish(self, future: Future) -> None:
+        self.in_flight -= 1
+        if future.cancelled():
+            return
+        if future.exception() is None:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+# Shared by every request on this worker
+password_hasher = PasswordHasher()
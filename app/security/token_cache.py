@@ -0,0 +1,85 @@
+import os
+import time
+import hashlib
+from typing import List, Optional
+
+from app.db.models import User
+from app.serializers.user_serializer import UserSerializer
+from app.utils.local_cache import LocalCache
+
+# Verified tokens remembered per worker
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 10000))
+# Longest a cached user is trusted without a fresh lookup, even if the token lives longer
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", 60))
+
+class TokenCache:
+    """
+    Remembers tokens that already passed verification, together with the user they resolved to.
+
+    Entries are keyed by a SHA-256 digest so raw tokens are never held in memory, and
+    expire at the token's `exp` or after AUTH_TOKEN_CACHE_TTL, whichever comes first.
+    invalidate_user drops a user's entries when their cached record changes.
+    """
+    def __init__(self, max_size: int = None, ttl: float = None):
+        self.entries = LocalCache(max_size=max_size or AUTH_TOKEN_CACHE_SIZE, ttl=ttl or AUTH_TOKEN_CACHE_TTL)
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[User]:
+        """
+        Get the user for a previously verified, unexpired token.
+        """
+        entry = self.entries.get(self.digest(token))
+        return entry[1] if entry else None
+
+    def set(self, token: str, claims: dict, user: User) -> None:
+        """
+        Remember a verified token until its exp claim.
+        
+        Args:
+            token: The raw bearer token.
+            claims: The verified claims.
+            user: The user the token resolved to. Cached as a detached copy.
+        """
+        ttl = claims.get("exp", 0) - time.time()
+        if ttl <= 0:
+            return
+        snapshot = UserSerializer.from_dict(UserSerializer.to_dict(user))
+        self.entries.set(self.digest(token), (claims, snapshot), ttl)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """
+        Drop every cached token that resolved to this user.
+        """
+        self.entries.delete_where(lambda entry: str(entry[1].id) == str(user_id))
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def get_stats(self) -> dict:
+        total = self.entries.hits + self.entries.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.entries.max_size,
+            "hits": self.entries.hits,
+            "misses": self.entries.misses,
+            "hit_rate": f"{(self.entries.hits / total) * 100 if total > 0 else 0:.2f}%"
+        }
+
+# Shared by every request on this worker
+token_cache = TokenCache()
+
+def invalidate_user_tokens(op: str, keys: Optional[List[str]]) -> None:
+    """
+    Cache invalidation listener: forget tokens whose user's cached record was deleted,
+    on whichever worker made the change.
+    """
+    if op == "clear":
+        token_cache.clear()
+        return
+    prefix = "user:id:"  # UserService.USER_ID_PREFIX, tagged with the user on every write
+    for key in keys or []:
+        if key.startswith(prefix):
+            token_cache.invalidate_user(key[len(prefix):])
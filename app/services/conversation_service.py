@@ -1,62 +1,107 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from fastapi import Depends
+from typing import Dict, List, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
+from app.utils.cache import Cache
 from app.repositories.conversation_repository import ConversationRepository
-from app.models.user import User, UserResponse
+from app.models.user import User
 from app.services.user_service import UserService
 from app.models.conversation import Conversation, ConversationType, CreateConversationRequest, ConversationResponse
 
 class ConversationService:
-    def __init__(self, user_service: UserService, db: Session = Depends(get_db)):
+    MEMBERS_PREFIX = "conversation:members"
+    # Cache tag shared by every entry derived from one conversation
+    CONVERSATION_TAG_PREFIX = "conversation"
+    TTL = 60 * 60 * 24
+
+    def __init__(self, user_service: UserService, db: AsyncSession, cache: Cache = None):
         self.repo = ConversationRepository(db)
         self.user_service = user_service
+        self.cache = cache
+
+    def conversation_tag(self, id: str) -> str:
+        """
+        Cache tag shared by every entry derived from one conversation
+        """
+        return f"{self.CONVERSATION_TAG_PREFIX}:{id}"
         
-    def create_conversation(self, request: CreateConversationRequest, creator: User) -> Conversation:
-        return self.repo.create(request, str(creator.id))
+    async def create_conversation(self, request: CreateConversationRequest, creator: User) -> Conversation:
+        """
+        Create a conversation. Raises UnknownMembersError if any member ID matches no user
+        """
+        conversation = await self.repo.create(request, str(creator.id))
+        await self.invalidate_members(str(conversation.id))
+        return conversation
 
-    def get_user_conversations(self, username: str) -> List[Conversation]:
-        user = self.user_service.get_user(username)
+    async def get_user_conversations(self, username: str) -> List[Conversation]:
+        user = await self.user_service.get_user(username)
         if not user:
             return []
-        return self.repo.get_user_conversations(str(user.id))
+        return await self.repo.get_user_conversations(str(user.id))
         
-    def get_conversation_by_id(self, conversation_id: str) -> Optional[Conversation]:
-        return self.repo.get_by_id(conversation_id)
+    async def get_conversation_by_id(self, conversation_id: str) -> Optional[Conversation]:
+        return await self.repo.get_by_id(conversation_id)
 
-    def get_conversation_response(self, conversation_id: str) -> ConversationResponse:
-        conversation = self.get_conversation_by_id(conversation_id)
+    async def get_conversation_response(self, conversation_id: str) -> ConversationResponse:
+        # Members come from the cached member set and one bulk user lookup rather than a join
+        conversation = await self.repo.get_by_id(conversation_id, with_members=False)
         if not conversation:
             return None
-            
-        # Get creator user
-        creator = self.user_service.get_user_by_id(str(conversation.creator_id))
-        creator_response = UserResponse(
-            id=str(creator.id),
-            name=creator.name,
-            username=creator.username,
-            status=creator.status
-        )
-        
-        # Get all members
-        member_responses = []
-        for member in conversation.members:
-            member_responses.append(UserResponse(
-                id=str(member.id),
-                name=member.name,
-                username=member.username,
-                status=member.status
-            ))
-        
+        member_ids = sorted(await self.get_member_ids(conversation_id))
+        users = await self.user_service.get_users_by_ids(member_ids)
+        members = [users[member_id] for member_id in member_ids if member_id in users]
+        return self.build_conversation_response(conversation, members)
+
+    async def get_conversation_responses(self, conversation_ids: List[str]) -> Dict[str, ConversationResponse]:
+        """
+        Build responses for several conversations with two queries in all: the conversations
+        with their creators, then every member. Conversations that do not exist are left out
+        """
+        conversations = await self.repo.get_by_ids(list(set(conversation_ids)))
+        return {
+            str(conversation.id): self.build_conversation_response(conversation)
+            for conversation in conversations
+        }
+
+    @staticmethod
+    def build_conversation_response(conversation: Conversation, members: Optional[List[User]] = None) -> ConversationResponse:
+        """
+        Build a response from a conversation loaded with its creator, and with its members
+        unless they are passed in. Runs no queries
+        """
+        if members is None:
+            members = conversation.members
         return ConversationResponse(
             id=str(conversation.id),
             name=conversation.name,
-            creator=creator_response,
+            creator=UserService.to_user_response(conversation.creator),
             created_at=conversation.created_at,
-            members=member_responses,
+            members=[UserService.to_user_response(member) for member in members],
             type=conversation.type
         )
         
-    def check_if_user_has_access_to_conversation(self, user_id: str, conversation_id: str) -> bool:
-        return self.repo.check_user_access(user_id, conversation_id)
+    async def get_member_ids(self, conversation_id: str) -> Set[str]:
+        """
+        Get the IDs of a conversation's members, from the cache when possible
+        """
+        if self.cache:
+            cached_members = await self.cache.get_cached(f"{self.MEMBERS_PREFIX}:{conversation_id}")
+            if cached_members is not None:
+                return set(cached_members)
+        member_ids = await self.repo.get_member_ids(conversation_id)
+        if self.cache and member_ids:
+            await self.cache.set_cache(
+                f"{self.MEMBERS_PREFIX}:{conversation_id}", sorted(member_ids), self.TTL,
+                tags=[self.conversation_tag(conversation_id)]
+            )
+        return member_ids
+
+    async def invalidate_members(self, conversation_id: str) -> None:
+        """
+        Drop the cached membership of a conversation. Call after any change to its members
+        """
+        if self.cache:
+            await self.cache.invalidate_tags(self.conversation_tag(conversation_id))
+        
+    async def check_if_user_has_access_to_conversation(self, user_id: str, conversation_id: str) -> bool:
+        # Answered from the cached member set, so hot conversations cost no query per message
+        return str(user_id) in await self.get_member_ids(conversation_id)
@@ -0,0 +1,23 @@
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_db
+from app.services.user_service import UserService
+from app.services.conversation_service import ConversationService
+from app.services.message_service import MessageService
+
+# Services are cheap wrappers around the request's session, so FastAPI builds them per request.
+# Dependencies are cached per request, which means every service in a request shares one session.
+
+def get_user_service(request: Request, db: AsyncSession = Depends(get_db)) -> UserService:
+    return UserService(db, request.app.state.cache)
+
+def get_conversation_service(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user_service: UserService = Depends(get_user_service)
+) -> ConversationService:
+    return ConversationService(user_service, db, request.app.state.cache)
+
+def get_message_service(db: AsyncSession = Depends(get_db)) -> MessageService:
+    return MessageService(db)
@@ -0,0 +1,104 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.repositories.message_repository import MESSAGE_ARCHIVE_AFTER_DAYS, MessageRepository, archive_horizon
+
+logger = logging.getLogger("main.services.message_archiver")
+
+# Seconds between archiving runs
+MESSAGE_ARCHIVE_INTERVAL = float(os.getenv("MESSAGE_ARCHIVE_INTERVAL", 3600))
+# Messages moved per transaction, so a run never holds long locks on the hot table
+MESSAGE_ARCHIVE_BATCH_SIZE = int(os.getenv("MESSAGE_ARCHIVE_BATCH_SIZE", 1000))
+
+class MessageArchiver:
+    """
+    Moves cold history out of the messages table.
+
+    Every MESSAGE_ARCHIVE_INTERVAL seconds, messages older than MESSAGE_ARCHIVE_AFTER_DAYS
+    are moved into messages_archive in batches of MESSAGE_ARCHIVE_BATCH_SIZE, so the hot
+    table and its indexes stay the size of recent traffic. MessageRepository pages across
+    both tables, so readers do not notice the move. MESSAGE_ARCHIVE_AFTER_DAYS <= 0 turns it
+    off, along with the archive reads.
+    """
+    def __init__(self, session_factory: async_sessionmaker,
+                 interval: float = None, batch_size: int = None, enabled: bool = None):
+        self.session_factory = session_factory
+        self.interval = interval or MESSAGE_ARCHIVE_INTERVAL
+        self.batch_size = batch_size or MESSAGE_ARCHIVE_BATCH_SIZE
+        self.enabled = MESSAGE_ARCHIVE_AFTER_DAYS > 0 if enabled is None else enabled
+        self._task: Optional[asyncio.Task] = None
+        self.archived_messages = 0
+        self.runs = 0
+        self.failed_runs = 0
+        self.last_run_at: Optional[float] = None
+
+    async def start(self) -> None:
+        """
+        Start archiving in the background.
+        """
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop archiving. A batch in progress is rolled back.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def archive_once(self) -> int:
+        """
+        Move every message older than the archive horizon.
+
+        Returns:
+            The number of messages moved; always 0 with archiving off
+        """
+        cutoff = archive_horizon()
+        if cutoff is None:
+            return 0
+        moved = 0
+        while True:
+            async with self.session_factory() as db:
+                batch = await MessageRepository(db).archive_before(cutoff, self.batch_size)
+            moved += batch
+            self.archived_messages += batch
+            if batch < self.batch_size:
+                break
+        self.runs += 1
+        self.last_run_at = time.time()
+        if moved:
+            logger.info(f"Archived {moved} messages older than {MESSAGE_ARCHIVE_AFTER_DAYS:g} days")
+        return moved
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.archive_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed_runs += 1
+                logger.error(f"Message archiving failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "archive_after_days": MESSAGE_ARCHIVE_AFTER_DAYS,
+            "interval_seconds": self.interval,
+            "batch_size": self.batch_size,
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "archived_messages": self.archived_messages,
+            "last_run_at": self.last_run_at,
+        }
@@ -0,0 +1,139 @@
+import os
+import asyncio
+import logging
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db.models.message import Message
+from app.repositories.message_repository import MessageRepository
+
+logger = logging.getLogger("main.services.message_ingestor")
+
+# Flush once this many messages are buffered...
+MESSAGE_FLUSH_BATCH_SIZE = int(os.getenv("MESSAGE_FLUSH_BATCH_SIZE", 100))
+# ...or once the oldest buffered message has waited this long
+MESSAGE_FLUSH_INTERVAL_MS = int(os.getenv("MESSAGE_FLUSH_INTERVAL_MS", 50))
+# Accepted messages waiting to be written. Senders wait when it is full
+MESSAGE_INGEST_QUEUE_SIZE = int(os.getenv("MESSAGE_INGEST_QUEUE_SIZE", 10000))
+# Attempts for a batch before it is split up and written row by row
+MESSAGE_FLUSH_RETRIES = int(os.getenv("MESSAGE_FLUSH_RETRIES", 3))
+
+class MessageIngestor:
+    """
+    Write-behind persistence for chat messages.
+
+    Accepted messages are queued and can be broadcast straight away. A single background
+    flusher per worker writes them with one multi-row INSERT per batch, every
+    MESSAGE_FLUSH_BATCH_SIZE messages or MESSAGE_FLUSH_INTERVAL_MS milliseconds.
+
+    Guarantees:
+        - Ordering: messages are written in the order they were submitted on this worker.
+          History is ordered by (timestamp, id), which is assigned at submit time.
+        - Durability: a message is durable only once its batch commits, normally within
+          MESSAGE_FLUSH_INTERVAL_MS. Messages still queued when a worker crashes are lost,
+          although they were already broadcast. stop() drains the queue on clean shutdown.
+        - Visibility: history reads can trail broadcasts by up to one flush interval.
+        - Failures: a batch is retried MESSAGE_FLUSH_RETRIES times, then written row by row
+          so that one bad row only drops itself. Dropped messages are logged and counted.
+    """
+    def __init__(self, session_factory: async_sessionmaker,
+                 batch_size: int = None, flush_interval_ms: int = None, queue_size: int = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or MESSAGE_FLUSH_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or MESSAGE_FLUSH_INTERVAL_MS) / 1000
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or MESSAGE_INGEST_QUEUE_SIZE)
+        self._flusher: Optional[asyncio.Task] = None
+        self.flushed_messages = 0
+        self.flushed_batches = 0
+        self.dropped_messages = 0
+
+    async def start(self) -> None:
+        """
+        Start the background flusher.
+        """
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Write everything still queued, then stop the flusher.
+        """
+        if self._flusher is None:
+            return
+        await self.queue.put(None)
+        await self._flusher
+        self._flusher = None
+
+    async def submit(self, message: Message) -> None:
+        """
+        Queue a message for persistence. Waits only if the queue is full.
+
+        Args:
+            message: A message built with MessageRepository.new_message
+        """
+        await self.queue.put(message)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self.queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    message = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        message = await asyncio.wait_for(self.queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if message is None:
+                    stopping = True
+                    break
+                batch.append(message)
+
+            await self._flush(batch)
+            if stopping:
+                # Anything queued behind the stop marker is still written before exiting
+                while not self.queue.empty():
+                    rest = []
+                    while len(rest) < self.batch_size and not self.queue.empty():
+                        message = self.queue.get_nowait()
+                        if message is not None:
+                            rest.append(message)
+                    await self._flush(rest)
+                return
+
+    async def _flush(self, batch: List[Message]) -> None:
+        if not batch:
+            return
+        for attempt in range(1, MESSAGE_FLUSH_RETRIES + 1):
+            try:
+                await self._write(batch)
+                self.flushed_batches += 1
+                self.flushed_messages += len(batch)
+                return
+            except Exception as e:
+                logger.warning(f"Message batch of {len(batch)} failed (attempt {attempt}): {e}")
+                if attempt < MESSAGE_FLUSH_RETRIES:
+                    await asyncio.sleep(self.flush_interval * attempt)
+
+        # Isolate the rows that cannot be written so the rest of the batch survives
+        for message in batch:
+            try:
+                await self._write([message])
+                self.flushed_messages += 1
+            except Exception as e:
+                self.dropped_messages += 1
+                logger.error(f"Dropping message {message.id} in conversation {message.conversation_id}: {e}")
+
+    async def _write(self, batch: List[Message]) -> None:
+        async with self.session_factory() as db:
+            await MessageRepository(db).create_many(batch)
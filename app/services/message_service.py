@@ -1,18 +1,19 @@
-from typing import List
-from sqlalchemy.orm import Session
-from fastapi import Depends
+from typing import Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
 from app.repositories.message_repository import MessageRepository
-from app.models.message import Message, MessageCreateRequest, MessageDeliveryStatus, MessageResponse
+from app.models.message import Message, MessageCreateRequest, MessageDeliveryStatus, MessagePage, MessageResponse
+from app.models.conversation import ConversationResponse
+from app.models.user import UserResponse
 from app.services.user_service import UserService
 from app.services.conversation_service import ConversationService
+from app.utils.cursor import NEWER, OLDER, decode_cursor, decode_search_cursor, encode_cursor, encode_search_cursor
 
 class MessageService:
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(self, db: AsyncSession):
         self.repo = MessageRepository(db)
 
-    def add_message(self, message: Message):
+    async def add_message(self, message: Message):
         """
         Adds a message to conversation
         
@@ -22,7 +23,7 @@ class MessageService:
         # This method is not needed anymore as the repository handles persistence
         pass
     
-    def get_messages(self, conversation_id: str, limit: int = 50, before_timestamp: float = None) -> List[Message]:
+    async def get_messages(self, conversation_id: str, limit: int = 50, before_timestamp: float = None) -> List[Message]:
         """
         Get messages for a specific conversation.
         Args:
@@ -33,9 +34,97 @@ class MessageService:
         Returns
             List of messages
         """
-        return self.repo.get_conversation_messages(conversation_id, limit, before_timestamp)
+        return await self.repo.get_conversation_messages(conversation_id, limit, before_timestamp)
 
-    def check_if_message_exists(self, conversation_id: str, message_id: str) -> bool:
+    async def get_message_page(self, conversation_id: str, limit: int = 50, cursor: Optional[str] = None, before_timestamp: float = None) -> MessagePage:
+        """
+        Get one page of a conversation's history using keyset pagination.
+
+        Args:
+            conversation_id: The ID of the conversation
+            limit: The maximum number of messages to return
+            cursor: An opaque cursor from a previous page's next_cursor or prev_cursor
+            before_timestamp: Legacy timestamp filter, used only when no cursor is given
+
+        Returns
+            A MessagePage with messages newest first. next_cursor pages to older
+            messages and prev_cursor pages to newer ones; either is None at the end.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        direction, before, after = OLDER, None, None
+        if cursor:
+            direction, timestamp, message_id = decode_cursor(cursor)
+            if direction == OLDER:
+                before = (timestamp, message_id)
+            else:
+                after = (timestamp, message_id)
+            before_timestamp = None
+
+        # Fetch one extra row to learn whether another page exists in the paging direction
+        messages = await self.repo.get_conversation_messages(
+            conversation_id, limit + 1, before_timestamp, before=before, after=after
+        )
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+
+        page = MessagePage(messages=messages)
+        if not messages:
+            return page
+
+        if direction == NEWER:
+            messages.reverse()
+            has_older, has_newer = True, has_more
+        else:
+            has_older, has_newer = has_more, cursor is not None or before_timestamp is not None
+
+        newest, oldest = messages[0], messages[-1]
+        if has_older:
+            page.next_cursor = encode_cursor(OLDER, oldest.timestamp, str(oldest.id))
+        if has_newer:
+            page.prev_cursor = encode_cursor(NEWER, newest.timestamp, str(newest.id))
+        return page
+
+    async def search_messages(
+        self,
+        terms: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        member_id: Optional[str] = None
+    ) -> MessagePage:
+        """
+        Search message content, best matches first, a page at a time.
+
+        Args:
+            terms: Free text; every word must match
+            limit: The maximum number of messages to return
+            cursor: An opaque cursor from a previous page's next_cursor
+            conversation_id: Only search this conversation
+            member_id: Only search conversations this user is a member of
+
+        Returns
+            A MessagePage ranked best first. next_cursor continues the results; None at the end.
+
+        Raises:
+            ValueError: If the cursor is malformed
+            SearchTimeoutError: If the database cancelled the search after SEARCH_TIMEOUT_MS
+            SearchUnavailableError: If the database has no full-text search support
+        """
+        after = decode_search_cursor(cursor) if cursor else None
+
+        # Fetch one extra row to learn whether another page exists
+        results = await self.repo.search(
+            terms, limit + 1, conversation_id=conversation_id, member_id=member_id, after=after
+        )
+        page = MessagePage(messages=[message for message, _ in results[:limit]])
+        if len(results) > limit:
+            last, score = results[limit - 1]
+            page.next_cursor = encode_search_cursor(score, last.timestamp, str(last.id))
+        return page
+
+    async def check_if_message_exists(self, conversation_id: str, message_id: str) -> bool:
         """
         Check if a message exists in a conversation.
 
@@ -46,10 +135,10 @@ class MessageService:
         Returns:
             True if the message exists, False otherwise
         """
-        message = self.repo.get_by_id(message_id)
+        message = await self.repo.get_by_id(message_id)
         return message is not None and str(message.conversation_id) == conversation_id
     
-    def update_messages_status(
+    async def update_messages_status(
         self, 
         conversation_id: str, 
         message_ids: List[str],  
@@ -71,11 +160,25 @@ class MessageService:
             Number of messages that were updated
         """
         if message_ids:
-            return self.repo.update_status(message_ids, status)
+            return await self.repo.update_status(message_ids, status)
         else:
-            return self.repo.update_status_by_criteria(conversation_id, before_timestamp, sender_id, status)
+            return await self.repo.update_status_by_criteria(conversation_id, before_timestamp, sender_id, status)
         
-    def create_message(self, request: MessageCreateRequest, sender_id: str) -> Message:
+    def build_message(self, request: MessageCreateRequest, sender_id: str) -> Message:
+        """
+        Build a new message with its ID and timestamp assigned, without persisting it.
+        Used with the MessageIngestor, which writes messages in batches.
+
+        Args:
+            request: The request containing the message data.
+            sender_id: The ID of the user sending the message.
+
+        Returns
+            The unsaved message
+        """
+        return MessageRepository.new_message(request, sender_id)
+
+    async def create_message(self, request: MessageCreateRequest, sender_id: str) -> Message:
         """
         Create a new message from the request.
 
@@ -86,9 +189,9 @@ class MessageService:
         Returns
             The created message
         """
-        return self.repo.create(request, sender_id)
+        return await self.repo.create(request, sender_id)
 
-    def create_message_response(self, message: Message, user_service: UserService, conversation_service: ConversationService) -> MessageResponse:
+    async def create_message_response(self, message: Message, user_service: UserService, conversation_service: ConversationService) -> MessageResponse:
         """
         Create a full MessageResponse object for a message.
 
@@ -102,10 +205,54 @@ class MessageService:
         """
         return MessageResponse(
             id=str(message.id),
-            sender=user_service.get_user_response(str(message.sender_id)),
+            sender=await user_service.get_user_response(str(message.sender_id)),
             content=message.content,
             type=message.type,
             status=message.status,
-            conversation=conversation_service.get_conversation_response(str(message.conversation_id)),
+            conversation=await conversation_service.get_conversation_response(str(message.conversation_id)),
             timestamp=message.timestamp
-        )
\ No newline at end of file
+        )
+
+    async def create_message_responses(self, messages: List[Message], user_service: UserService, conversation_service: ConversationService) -> List[MessageResponse]:
+        """
+        Create MessageResponse objects for a page of messages in one pass.
+
+        A single conversation comes from its cached member set; several, as in
+        cross-conversation search, are loaded together with one IN query plus one
+        members query. All distinct senders are fetched with a single bulk lookup,
+        so the cost does not grow with messages x members or with conversations.
+
+        Args:
+            messages: The messages to render, in the order they should be returned
+            user_service: Service to look up user details
+            conversation_service: Service to look up conversation details
+
+        Returns:
+            A list of MessageResponse objects in the same order as messages
+        """
+        conversation_ids = {str(message.conversation_id) for message in messages}
+        conversations: Dict[str, ConversationResponse] = {}
+        if len(conversation_ids) == 1:
+            conversation_id = conversation_ids.pop()
+            conversations[conversation_id] = await conversation_service.get_conversation_response(conversation_id)
+        elif conversation_ids:
+            conversations = await conversation_service.get_conversation_responses(list(conversation_ids))
+
+        senders = await user_service.get_users_by_ids([str(message.sender_id) for message in messages])
+        sender_responses: Dict[str, UserResponse] = {
+            user_id: UserService.to_user_response(user)
+            for user_id, user in senders.items()
+        }
+
+        return [
+            MessageResponse(
+                id=str(message.id),
+                sender=sender_responses.get(str(message.sender_id)),
+                content=message.content,
+                type=message.type,
+                status=message.status,
+                conversation=conversations.get(str(message.conversation_id)),
+                timestamp=message.timestamp
+            )
+            for message in messages
+        ]
@@ -1,118 +1,152 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from fastapi import Depends
+from typing import Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
 from app.utils.cache import Cache
 from app.repositories.user_repository import UserRepository
 from app.models.user import User, UserRegistrationRequest, UserResponse, UserStatus
-from app.security.password_security import hash_password, verify_password
+from app.security.password_security import PasswordHasher, password_hasher
+from app.security.token_cache import token_cache
 from app.serializers.user_serializer import UserSerializer
 
 class UserService:
     USER_ID_PREFIX = "user:id"
     USER_USERNAME_PREFIX = "user:username"
-    USER_RESPONSE_PREFIX = "user:response"
     USERS_ALL_KEY = "users:all"
+    # Cache tags: every entry derived from one user, and every entry listing users
+    USER_TAG_PREFIX = "user"
+    USERS_TAG = "users"
     TTL = 60 * 60 * 24
     
-    def __init__(self, db: Session = Depends(get_db), cache: Cache = Depends(Cache)):
+    def __init__(self, db: AsyncSession, cache: Cache, hasher: PasswordHasher = password_hasher):
         self.repo = UserRepository(db)
         self.cache = cache
+        self.hasher = hasher
 
-    def add_user(self, user_request: UserRegistrationRequest) -> User:
+    def user_tag(self, id: str) -> str:
         """
-        Add a new user
+        Cache tag shared by every entry derived from one user
         """
-        hashed_password = hash_password(user_request.password)
-        user = self.repo.create(user_request, hashed_password)
+        return f"{self.USER_TAG_PREFIX}:{id}"
+
+    async def add_user(self, user_request: UserRegistrationRequest) -> User:
+        """
+        Add a new user. Raises PasswordHasherOverloaded when hashing is saturated
+        """
+        hashed_password = await self.hasher.hash(user_request.password)
+        user = await self.repo.create(user_request, hashed_password)
         if self.cache:
-            self.cache.invalidate(self.USERS_ALL_KEY)
+            await self.cache.invalidate_tags(self.USERS_TAG)
         return user
     
-    def authenticate_user(self, username: str, password: str) -> Optional[User]:
+    async def authenticate_user(self, username: str, password: str) -> Optional[User]:
         """
-        Authenticate a user
+        Authenticate a user. Raises PasswordHasherOverloaded when hashing is saturated
         """
-        user = self.repo.get_by_username(username)
+        user = await self.repo.get_by_username(username)
         if not user:
             return None
-        if not verify_password(password, user.password):
+        if not await self.hasher.verify(password, user.password):
             return None
         return user
     
-    def get_user(self, username: str) -> Optional[User]:
+    async def get_user(self, username: str) -> Optional[User]:
         """
         Get a user by username
         """
         if self.cache:
-            cached_user = self.cache.get_cached(f"{self.USER_USERNAME_PREFIX}:{username}")
+            cached_user = await self.cache.get_cached(f"{self.USER_USERNAME_PREFIX}:{username}")
             if cached_user:
                 return UserSerializer.from_dict(cached_user)
         
-        user = self.repo.get_by_username(username)
+        user = await self.repo.get_by_username(username)
         if self.cache and user:
-            self.cache.set_cache(f"{self.USER_USERNAME_PREFIX}:{username}", UserSerializer.to_dict(user), self.TTL)
+            await self.cache.set_cache(f"{self.USER_USERNAME_PREFIX}:{username}", UserSerializer.to_dict(user), self.TTL, tags=[self.user_tag(user.id)])
         return user
 
-    def get_user_by_id(self, id: str) -> Optional[User]:
+    async def get_user_by_id(self, id: str) -> Optional[User]:
         """
         Get a user by ID
         """
         if self.cache:
-            cached_user = self.cache.get_cached(f"{self.USER_ID_PREFIX}:{id}")
+            cached_user = await self.cache.get_cached(f"{self.USER_ID_PREFIX}:{id}")
             if cached_user:
                 return UserSerializer.from_dict(cached_user)
-        user = self.repo.get_by_id(id)
+        user = await self.repo.get_by_id(id)
         if self.cache and user:
             user_dict = UserSerializer.to_dict(user)
-            self.cache.set_cache(f"{self.USER_ID_PREFIX}:{id}", user_dict, self.TTL)
+            await self.cache.set_cache(f"{self.USER_ID_PREFIX}:{id}", user_dict, self.TTL, tags=[self.user_tag(id)])
         return user
     
-    def get_user_response(self, id: str) -> Optional[UserResponse]:
+    async def get_users_by_ids(self, ids: List[str]) -> Dict[str, User]:
         """
-        Get a user response object
+        Get several users at once, keyed by ID. Unknown IDs are left out of the result
         """
-        user = self.get_user_by_id(id)
-        if not user:
-            return None
-        
+        ids = list(dict.fromkeys(str(id) for id in ids))
+        users: Dict[str, User] = {}
         if self.cache:
-            cached_response = self.cache.get_cached(f"{self.USER_RESPONSE_PREFIX}:{id}")
-            if cached_response:
-                return cached_response
-        
-        response = UserResponse(
+            # One MGET for every cached user, then one IN query for the rest
+            cached = await self.cache.get_many([f"{self.USER_ID_PREFIX}:{id}" for id in ids])
+            for user_dict in cached.values():
+                user = UserSerializer.from_dict(user_dict)
+                users[str(user.id)] = user
+        missing = [id for id in ids if id not in users]
+        if not missing:
+            return users
+
+        loaded = await self.repo.get_by_ids(missing)
+        for user in loaded:
+            users[str(user.id)] = user
+        if self.cache and loaded:
+            await self.cache.set_many(
+                {f"{self.USER_ID_PREFIX}:{user.id}": UserSerializer.to_dict(user) for user in loaded},
+                self.TTL,
+                tags={f"{self.USER_ID_PREFIX}:{user.id}": [self.user_tag(str(user.id))] for user in loaded}
+            )
+        return users
+    
+    @staticmethod
+    def to_user_response(user: User) -> UserResponse:
+        """
+        Build the public view of a user
+        """
+        return UserResponse(
             id=str(user.id),
             name=user.name,
             username=user.username,
             status=user.status
         )
+
+    async def get_user_response(self, id: str) -> Optional[UserResponse]:
+        """
+        Get a user response object
+        """
+        user = await self.get_user_by_id(id)
+        if not user:
+            return None
+        return self.to_user_response(user)
         
-        if self.cache:
-            self.cache.set_cache(f"{self.USER_RESPONSE_PREFIX}:{id}", response, self.TTL)
-        
-        return response
-        
-    def get_all_users(self) -> List[User]:
+    async def get_all_users(self) -> List[User]:
         """
         Get all registered users
         """
         if self.cache:
-            cached_users = self.cache.get_cached(self.USERS_ALL_KEY)
+            cached_users = await self.cache.get_cached(self.USERS_ALL_KEY)
             if cached_users:
                 return [UserSerializer.from_dict(u) for u in cached_users]
-            users = self.repo.get_all()
-            self.cache.set_cache(self.USERS_ALL_KEY, [UserSerializer.to_dict(u) for u in users], self.TTL)
+            users = await self.repo.get_all()
+            await self.cache.set_cache(self.USERS_ALL_KEY, [UserSerializer.to_dict(u) for u in users], self.TTL, tags=[self.USERS_TAG])
             return users
+        return await self.repo.get_all()
                 
-    def update_user_status(self, user_id: str, status: UserStatus) -> Optional[User]:
+    async def update_user_status(self, user_id: str, status: UserStatus) -> Optional[User]:
         """
         Update a user's status
         """
-        user = self.repo.update_status(user_id, status)
+        user = await self.repo.update_status(user_id, status)
+        if user:
+            # Cached tokens carry a copy of the user; other workers drop theirs via the cache invalidation listener
+            token_cache.invalidate_user(user_id)
         if self.cache and user:
-            self.cache.invalidate(f"{self.USER_ID_PREFIX}:{user_id}")
-            self.cache.invalidate(f"{self.USER_USERNAME_PREFIX}:{user.username}")
-            self.cache.invalidate(f"{self.USER_RESPONSE_PREFIX}:{user_id}")
+            # One round trip drops the user's entries and the user listings that show their status
+            await self.cache.invalidate_tags(self.user_tag(user_id), self.USERS_TAG)
         return user
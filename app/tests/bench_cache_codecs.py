@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# filepath: bench_cache_codecs.py
+#
+# Micro-benchmark for the cache codecs. Run from the repository root:
+#   python -m app.tests.bench_cache_codecs [iterations]
+
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict
+
+from app.models.user import UserResponse, UserStatus
+from app.utils.codecs import CodecFactory, decode_envelope, encode_envelope
+
+ITERATIONS = 20000
+
+def sample_payloads() -> Dict[str, Any]:
+    """Shapes the services actually cache"""
+    user = {"id": str(uuid.uuid4()), "name": "Jane Smith", "username": "janesmith", "status": UserStatus.ONLINE}
+    return {
+        "user dict": user,
+        "user response": UserResponse(**user),
+        "500 users": [dict(user, id=str(uuid.uuid4())) for _ in range(500)],
+        "member ids": sorted(str(uuid.uuid4()) for _ in range(200)),
+    }
+
+def time_per_op(fn: Callable[[], Any], iterations: int) -> float:
+    """Average microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def run_benchmark(iterations: int = ITERATIONS) -> None:
+    codecs = [name for name in CodecFactory.CODECS if CodecFactory.available(name)]
+    print(f"{'payload':<16}{'codec':<10}{'encode us':>12}{'decode us':>12}{'bytes':>10}")
+    for label, payload in sample_payloads().items():
+        # Large payloads get fewer rounds so the run stays short
+        rounds = max(iterations // 100, 100) if isinstance(payload, list) else iterations
+        for name in codecs:
+            codec = CodecFactory.create_codec(name)
+            data = encode_envelope(codec, payload)
+            encode_us = time_per_op(lambda: encode_envelope(codec, payload), rounds)
+            decode_us = time_per_op(lambda: decode_envelope(data), rounds)
+            print(f"{label:<16}{name:<10}{encode_us:>12.2f}{decode_us:>12.2f}{len(data):>10}")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else ITERATIONS)
@@ -0,0 +1,18 @@
+# Pytest setup for the in-process tests. Run from the repository root:
+#   python -m pytest app/tests
+#
+# The app reads its settings at import time, so they are set here, before any test
+# module imports it: a throwaway SQLite database, and per-request query headers for
+# assert_response_budget. Without a reachable Redis the cache runs in fallback mode,
+# so budgets are measured against the uncached path.
+
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="chatter-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_db_dir}/chatter.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("QUERY_STATS_HEADERS", "true")
+
+# Needs a running server; run it directly with python app/tests/test_chatter_flow.py
+collect_ignore = ["test_chatter_flow.py"]
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# filepath: load_test.py
+#
+# Load test for the REST and WebSocket paths. Run from the repository root:
+#
+#   # against a running server (docker-compose, or uvicorn with local Postgres/Redis)
+#   python -m app.tests.load_test --base-url http://localhost:8000
+#
+#   # or let the harness start uvicorn itself on SQLite, with no Redis (cache in fallback mode)
+#   python -m app.tests.load_test --serve
+#
+# Needs httpx and websockets. Results are written as JSON (see --output) so runs on
+# different commits can be compared; each file records the commit and the configuration.
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+PASSWORD = "loadtest-password"
+CONTENT_PREFIX = "lt"
+
+@dataclass
+class OperationStats:
+    """Latencies and errors for one kind of operation"""
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    started: float = 0.0
+    finished: float = 0.0
+
+    def record(self, seconds: float, ok: bool) -> None:
+        if ok:
+            self.latencies.append(seconds)
+        else:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, float]:
+        elapsed = max(self.finished - self.started, 1e-9)
+        return {
+            "count": len(self.latencies),
+            "errors": self.errors,
+            "throughput_per_s": round(len(self.latencies) / elapsed, 2),
+            **latency_summary(self.latencies),
+        }
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max in milliseconds"""
+    ordered = sorted(values)
+    return {
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round((ordered[-1] if ordered else 0.0) * 1000, 2),
+    }
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.stats: Dict[str, OperationStats] = {}
+        self.tokens: Dict[str, str] = {}
+        self.user_ids: Dict[str, str] = {}
+        self.conversations: List[Dict] = []
+        self.semaphore = asyncio.Semaphore(args.concurrency)
+        self.sent_messages = 0
+        self.fanout_delays: List[float] = []
+        self.expected_deliveries = 0
+
+    async def timed(self, name: str, client: httpx.AsyncClient, method: str, url: str, expect: int = 200, **kwargs) -> Optional[httpx.Response]:
+        """Run one request under the concurrency limit and record its latency"""
+        stats = self.stats.setdefault(name, OperationStats())
+        async with self.semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                ok = response.status_code == expect
+            except httpx.HTTPError:
+                response, ok = None, False
+            stats.record(time.perf_counter() - start, ok)
+        return response if ok else None
+
+    async def phase(self, name: str, coroutines) -> None:
+        """Run a batch of operations concurrently, timing the phase as a whole"""
+        stats = self.stats.setdefault(name, OperationStats())
+        stats.started = time.perf_counter()
+        await asyncio.gather(*coroutines)
+        stats.finished = time.perf_counter()
+        log(f"{name}: {stats.summary()}")
+
+    async def register(self, client: httpx.AsyncClient, username: str) -> None:
+        response = await self.timed("register", client, "POST", "/v1/users/register", expect=201,
+                                    json={"name": username, "username": username, "password": PASSWORD})
+        if response is not None:
+            self.user_ids[username] = response.json()["id"]
+
+    async def login(self, client: httpx.AsyncClient, username: str) -> None:
+        response = await self.timed("login", client, "POST", "/v1/users/login",
+                                    json={"username": username, "password": PASSWORD})
+        if response is not None:
+            self.tokens[username] = response.json()["access_token"]
+
+    async def create_conversation(self, client: httpx.AsyncClient, members: List[str]) -> None:
+        creator, others = members[0], members[1:]
+        response = await self.timed("create_conversation", client, "POST", "/v1/conversations", expect=201,
+                                    headers=self.auth(creator),
+                                    json={"name": f"load-{self.run_id}", "member_ids": [self.user_ids[u] for u in others]})
+        if response is not None:
+            self.conversations.append({"id": response.json()["id"], "members": members})
+
+    async def list_conversations(self, client: httpx.AsyncClient, username: str) -> None:
+        await self.timed("list_conversations", client, "GET", "/v1/conversations", headers=self.auth(username))
+
+    async def message_history(self, client: httpx.AsyncClient, username: str, conversation_id: str) -> None:
+        await self.timed("message_history", client, "GET", f"/v1/conversations/{conversation_id}/messages",
+                         headers=self.auth(username), params={"limit": 50})
+
+    def auth(self, username: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[username]}"}
+
+    def ws_url(self, conversation_id: str, username: str) -> str:
+        base = self.args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+        return f"{base}/ws/{conversation_id}?token={self.tokens[username]}"
+
+    async def receiver(self, socket, stop: asyncio.Event) -> None:
+        """Record the delay from send to delivery of every load-test message on this socket"""
+        while not stop.is_set():
+            try:
+                frame = await asyncio.wait_for(socket.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            except websockets.ConnectionClosed:
+                return
+            content = json.loads(frame).get("content", "")
+            if content.startswith(CONTENT_PREFIX + ":"):
+                self.fanout_delays.append(time.time() - float(content.split(":")[2]))
+
+    async def sender(self, socket, members: int, deadline: float) -> None:
+        """Send at a fixed rate until the deadline; schedules are absolute so slow sends do not lower the rate"""
+        interval = 1 / self.args.rate
+        next_send = time.perf_counter()
+        while time.perf_counter() < deadline:
+            content = f"{CONTENT_PREFIX}:{uuid.uuid4().hex[:8]}:{time.time():.6f}"
+            try:
+                await socket.send(json.dumps({"content": content, "type": "text"}))
+            except websockets.ConnectionClosed:
+                self.stats["ws_send"].errors += 1
+                return
+            self.sent_messages += 1
+            # Every member, the sender included, should receive it
+            self.expected_deliveries += members
+            next_send += interval
+            await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+
+    async def websocket_phase(self) -> Dict:
+        """Connect every member of every conversation; the first senders_per_conversation members also send"""
+        stop = asyncio.Event()
+        sockets, receivers, senders = [], [], []
+        connect_stats = self.stats.setdefault("ws_connect", OperationStats())
+        self.stats.setdefault("ws_send", OperationStats())
+        connect_stats.started = time.perf_counter()
+        for conversation in self.conversations:
+            for username in conversation["members"]:
+                start = time.perf_counter()
+                try:
+                    socket = await websockets.connect(self.ws_url(conversation["id"], username))
+                except (OSError, websockets.WebSocketException):
+                    connect_stats.record(time.perf_counter() - start, False)
+                    continue
+                connect_stats.record(time.perf_counter() - start, True)
+                sockets.append((conversation, username, socket))
+                receivers.append(asyncio.create_task(self.receiver(socket, stop)))
+        connect_stats.finished = time.perf_counter()
+        log(f"ws_connect: {connect_stats.summary()}")
+
+        started = time.perf_counter()
+        deadline = started + self.args.duration
+        for conversation, username, socket in sockets:
+            if conversation["members"].index(username) < self.args.senders_per_conversation:
+                senders.append(self.sender(socket, len(conversation["members"]), deadline))
+        await asyncio.gather(*senders)
+        sent_seconds = time.perf_counter() - started
+        # Let in-flight broadcasts land before counting
+        await asyncio.sleep(self.args.drain)
+        stop.set()
+        await asyncio.gather(*receivers, return_exceptions=True)
+        for _, _, socket in sockets:
+            await socket.close()
+
+        return {
+            "connections": len(sockets),
+            "senders": len(senders),
+            "messages_sent": self.sent_messages,
+            "send_rate_per_s": round(self.sent_messages / sent_seconds, 2),
+            "deliveries_expected": self.expected_deliveries,
+            "deliveries_received": len(self.fanout_delays),
+            "delivery_ratio": round(len(self.fanout_delays) / self.expected_deliveries, 4) if self.expected_deliveries else 0.0,
+            "delivered_per_s": round(len(self.fanout_delays) / sent_seconds, 2),
+            "fanout_delay": latency_summary(self.fanout_delays),
+        }
+
+    async def run(self) -> Dict:
+        args = self.args
+        usernames = [f"lt{self.run_id}u{i}" for i in range(args.users)]
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=30, limits=limits) as client:
+            await self.phase("register", [self.register(client, u) for u in usernames])
+            await self.phase("login", [self.login(client, u) for u in usernames if u in self.user_ids])
+
+            ready = [u for u in usernames if u in self.tokens]
+            groups = [ready[i:i + args.group_size] for i in range(0, len(ready), args.group_size)]
+            await self.phase("create_conversation", [self.create_conversation(client, g) for g in groups if len(g) > 1])
+
+            websocket_results = await self.websocket_phase()
+
+            await self.phase("list_conversations", [
+                self.list_conversations(client, u) for _ in range(args.read_rounds) for u in ready
+            ])
+            await self.phase("message_history", [
+                self.message_history(client, u, c["id"])
+                for _ in range(args.read_rounds) for c in self.conversations for u in c["members"]
+            ])
+
+        return {
+            "run_id": self.run_id,
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "config": {k: v for k, v in vars(args).items() if k != "output"},
+            "rest": {name: stats.summary() for name, stats in self.stats.items() if not name.startswith("ws_")},
+            "websocket": {
+                "connect": self.stats["ws_connect"].summary(),
+                "send_errors": self.stats["ws_send"].errors,
+                **websocket_results,
+            },
+        }
+
+def log(message: str) -> None:
+    print(f"[{time.strftime('%H:%M:%S')}] {message}", file=sys.stderr)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def start_server(port: int) -> subprocess.Popen:
+    """Start uvicorn on a throwaway SQLite database, for runs without Postgres"""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/load.db")
+    env.setdefault("SECRET_KEY", "load-test-secret")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+
+async def wait_for_server(base_url: str, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"Server at {base_url} did not become healthy")
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Chatter load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--serve", action="store_true", help="start uvicorn on SQLite for the run")
+    parser.add_argument("--port", type=int, default=8765, help="port for --serve")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--group-size", type=int, default=10, help="members per conversation")
+    parser.add_argument("--senders-per-conversation", type=int, default=2)
+    parser.add_argument("--rate", type=float, default=5.0, help="messages per second per sender")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of WebSocket traffic")
+    parser.add_argument("--drain", type=float, default=2.0, help="seconds to wait for in-flight broadcasts")
+    parser.add_argument("--read-rounds", type=int, default=3, help="listing and history requests per user")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent REST requests")
+    parser.add_argument("--output", default=None, help="results file; defaults to load_results/<commit>-<run>.json")
+    args = parser.parse_args(argv)
+    if args.serve:
+        args.base_url = f"http://127.0.0.1:{args.port}"
+    return args
+
+async def main(args: argparse.Namespace) -> Dict:
+    server = start_server(args.port) if args.serve else None
+    try:
+        await wait_for_server(args.base_url)
+        return await LoadTest(args).run()
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    output = args.output or os.path.join("load_results", f"{results['commit'] or 'nocommit'}-{results['run_id']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    log(f"Results written to {output}")
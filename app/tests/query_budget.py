@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# filepath: query_budget.py
+#
+# Query-budget assertions, to catch N+1 regressions before they ship.
+#
+#   from fastapi.testclient import TestClient
+#   from app.main import app
+#   from app.tests.query_budget import assert_max_queries
+#
+#   with TestClient(app) as client:
+#       with assert_max_queries(4):
+#           client.get("/v1/conversations", headers=auth)
+#
+# Statements are counted on the engine itself, so this works with TestClient,
+# which runs the app on another thread, as well as with direct service calls.
+# For a running server, enable QUERY_STATS_HEADERS and use assert_response_budget.
+
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db import engine as default_engine
+from app.db.routing import read_router
+
+class QueryCapture:
+    """Statements run while capturing"""
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def report(self) -> str:
+        return "\n".join(f"  {i + 1}. {' '.join(s.split())[:200]}" for i, s in enumerate(self.statements))
+
+@contextmanager
+def capture_queries(engine: AsyncEngine = None) -> Iterator[QueryCapture]:
+    """
+    Record every statement the engine runs inside the block.
+
+    Args:
+        engine: Engine to watch. Defaults to the application engine and every read replica
+    """
+    engines = [engine] if engine is not None else [default_engine, *read_router.replicas]
+    capture = QueryCapture()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        capture.statements.append(statement)
+
+    for watched in engines:
+        event.listen(watched.sync_engine, "after_cursor_execute", record)
+    try:
+        yield capture
+    finally:
+        for watched in engines:
+            event.remove(watched.sync_engine, "after_cursor_execute", record)
+
+@contextmanager
+def assert_max_queries(max_queries: int, engine: AsyncEngine = None) -> Iterator[QueryCapture]:
+    """
+    Fail if the block runs more than max_queries statements.
+
+    Args:
+        max_queries: The budget
+        engine: Engine to watch. Defaults to the application engine and every read replica
+    """
+    with capture_queries(engine) as capture:
+        yield capture
+    assert capture.count <= max_queries, \
+        f"Expected at most {max_queries} queries, ran {capture.count}:\n{capture.report()}"
+
+def assert_response_budget(response, max_queries: int) -> None:
+    """
+    Fail if a response's X-DB-Queries header exceeds max_queries.
+    Needs a server started with QUERY_STATS_HEADERS=true.
+    """
+    queries = response.headers.get("X-DB-Queries")
+    assert queries is not None, "X-DB-Queries header missing; start the server with QUERY_STATS_HEADERS=true"
+    assert int(queries) <= max_queries, f"Expected at most {max_queries} queries, ran {queries}"
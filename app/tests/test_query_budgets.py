@@ -0,0 +1,118 @@
+# Query budgets for the hot read endpoints. Each budget is a constant, checked against
+# data large enough that a query per row (an N+1) would blow it.
+#   python -m pytest app/tests
+
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.db import SessionLocal
+from app.db.models.message import Message
+from app.models.message import MessageDeliveryStatus, MessageType
+from app.repositories.message_repository import MessageRepository
+from app.tests.query_budget import assert_max_queries, assert_response_budget
+
+USERS = 12
+CONVERSATIONS = 8
+MESSAGES = 40
+# History page size, small enough that MESSAGES spans several pages
+PAGE_SIZE = 15
+
+# Uncached counts. The token cache answers auth after the fixture's first request.
+# The caller, the conversations with their creators, then every member in one IN query
+CONVERSATION_LIST_BUDGET = 3
+# Access check (member ids), the page, the conversation's age when the page is short, the
+# conversation, its member ids, one bulk member lookup and one bulk sender lookup
+MESSAGE_PAGE_BUDGET = 7
+# Every user, plus one for auth should the token not be cached
+USER_LIST_BUDGET = 2
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="module")
+def chat(client):
+    """USERS users, all in CONVERSATIONS conversations, with MESSAGES messages from all of them in the first"""
+    users = []
+    suffix = uuid.uuid4().hex[:8]
+    for i in range(USERS):
+        username = f"budget{i}_{suffix}"
+        response = client.post("/v1/users/register", json={"name": username, "username": username, "password": "password123"})
+        assert response.status_code == 201, response.text
+        login = client.post("/v1/users/login", json={"username": username, "password": "password123"})
+        assert login.status_code == 200, login.text
+        users.append({"id": response.json()["id"], "token": login.json()["access_token"]})
+
+    headers = {"Authorization": f"Bearer {users[0]['token']}"}
+    conversation_ids = []
+    for i in range(CONVERSATIONS):
+        response = client.post(
+            "/v1/conversations",
+            json={"name": f"budget {i}", "member_ids": [user["id"] for user in users[1:]]},
+            headers=headers
+        )
+        assert response.status_code == 201, response.text
+        conversation_ids.append(response.json()["id"])
+
+    async def seed_messages():
+        now = time.time()
+        async with SessionLocal() as db:
+            await MessageRepository(db).create_many([
+                Message(
+                    id=str(uuid.uuid4()),
+                    sender_id=users[i % USERS]["id"],
+                    conversation_id=conversation_ids[0],
+                    content=f"message {i}",
+                    timestamp=now + i / 1000,
+                    type=MessageType.TEXT,
+                    status=MessageDeliveryStatus.PENDING
+                )
+                for i in range(MESSAGES)
+            ])
+    client.portal.call(seed_messages)
+
+    return {"headers": headers, "conversation_id": conversation_ids[0]}
+
+def test_conversation_list_budget(client, chat):
+    with assert_max_queries(CONVERSATION_LIST_BUDGET):
+        response = client.get("/v1/conversations", headers=chat["headers"])
+    assert response.status_code == 200, response.text
+    assert len(response.json()) >= CONVERSATIONS
+    assert all(len(conversation["members"]) == USERS for conversation in response.json())
+
+def test_message_history_budget(client, chat):
+    url = f"/v1/conversations/{chat['conversation_id']}/messages"
+    with assert_max_queries(MESSAGE_PAGE_BUDGET):
+        response = client.get(url, params={"limit": PAGE_SIZE}, headers=chat["headers"])
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == PAGE_SIZE
+    next_cursor = response.headers.get("X-Next-Cursor")
+    assert next_cursor
+
+    # Older and newer pages cost the same, through the cursors
+    with assert_max_queries(MESSAGE_PAGE_BUDGET):
+        response = client.get(url, params={"limit": PAGE_SIZE, "cursor": next_cursor}, headers=chat["headers"])
+    assert response.status_code == 200, response.text
+    assert response.json()
+    prev_cursor = response.headers.get("X-Prev-Cursor")
+    assert prev_cursor
+
+    with assert_max_queries(MESSAGE_PAGE_BUDGET):
+        response = client.get(url, params={"limit": PAGE_SIZE, "cursor": prev_cursor}, headers=chat["headers"])
+    assert response.status_code == 200, response.text
+    assert response.json()
+
+def test_user_list_budget(client, chat):
+    with assert_max_queries(USER_LIST_BUDGET):
+        response = client.get("/v1/users", headers=chat["headers"])
+    assert response.status_code == 200, response.text
+    assert len(response.json()) >= USERS - 1
+
+def test_response_budget_headers(client, chat):
+    response = client.get("/v1/conversations", headers=chat["headers"])
+    assert_response_budget(response, CONVERSATION_LIST_BUDGET)
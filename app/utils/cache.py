@@ -1,46 +1,131 @@
+import os
 import json
 import time
+import asyncio
 import logging
+from typing import Any, Callable, Dict, List, Optional, Type
+from pydantic import BaseModel
 from app.db.redis_client import RedisClient
+from app.utils.codecs import CacheCodec, CodecFactory, decode_envelope, encode_envelope
+from app.utils.local_cache import LocalCache
 
 logger = logging.getLogger("cache")
 
+# Optional L1 tier: an in-process LRU/TTL cache in front of Redis
+CACHE_L1_ENABLED = os.getenv("CACHE_L1_ENABLED", "false").lower() == "true"
+CACHE_L1_MAX_SIZE = int(os.getenv("CACHE_L1_MAX_SIZE", 10000))
+# Kept short: it bounds staleness if an invalidation message is ever missed
+CACHE_L1_TTL = float(os.getenv("CACHE_L1_TTL", 30))
+
+# Deletes every key tracked by the given tag sets, and the sets themselves, in one round trip.
+# Removed keys are announced on the invalidation channel (ARGV[1]) so other workers can drop them from L1.
+INVALIDATE_TAGS_SCRIPT = """
+local removed = {}
+for _, tag in ipairs(KEYS) do
+    local members = redis.call('SMEMBERS', tag)
+    for _, key in ipairs(members) do
+        redis.call('UNLINK', key)
+        table.insert(removed, key)
+    end
+    redis.call('UNLINK', tag)
+end
+if ARGV[1] ~= '' and #removed > 0 then
+    redis.call('PUBLISH', ARGV[1], cjson.encode({op = 'delete', targets = removed}))
+end
+return removed
+"""
+
 class Cache:
-    def __init__(self, redis_client: RedisClient):
+    # Every worker listens here and drops invalidated keys from its L1
+    INVALIDATION_CHANNEL = "cache:invalidations"
+    # Prefix of the Redis sets that track which keys carry a tag
+    TAG_PREFIX = "cache:tag"
+
+    def __init__(self, redis_client: RedisClient, local_cache: Optional[LocalCache] = None, codec: Optional[CacheCodec] = None):
         self.client = redis_client
+        # Writes use this codec; reads decode with whichever codec the entry's header names
+        self.codec = codec or CodecFactory.create_codec()
         self.is_connected = False
         self.hits = 0
         self.misses = 0
-        self.total_db_time_saved = 0
-        
+        self.redis_hits = 0
+        self.redis_misses = 0
+        if local_cache is None and CACHE_L1_ENABLED:
+            local_cache = LocalCache(max_size=CACHE_L1_MAX_SIZE, ttl=CACHE_L1_TTL)
+        self.local = local_cache
+        self._listener: Optional[asyncio.Task] = None
+        self._invalidate_tags_script = None
+        # Called with (op, keys) for every invalidation, local or from another worker
+        self._invalidation_listeners: List[Callable[[str, Optional[List[str]]], None]] = []
+    
+    async def connect(self) -> None:
+        """
+        Connect to Redis. Call once at startup; if Redis is unreachable the cache
+        stays in fallback mode and every lookup is a miss.
+        """
         try:
-            self.client.initialize_connection()
+            await self.client.initialize_connection()
             self.is_connected = True
             logger.info("Cache initialized successfully")
         except Exception as e:
             logger.warning(f"Redis connection failed: {e}")
             logger.warning("Cache will operate in fallback mode (no caching)")
+            return
+
+        if self.tracks_invalidations:
+            self._listener = asyncio.create_task(self._listen_for_invalidations())
+
+    @property
+    def tracks_invalidations(self) -> bool:
+        """
+        Whether invalidations are broadcast between workers: needed by the L1 tier
+        and by any in-process cache registered with add_invalidation_listener.
+        """
+        return self.local is not None or bool(self._invalidation_listeners)
+
+    def add_invalidation_listener(self, callback: Callable[[str, Optional[List[str]]], None]) -> None:
+        """
+        Register a callback for every invalidation seen by this worker. Register before connect().
+        
+        Args:
+            callback: Called with the op ("delete" or "clear") and the deleted keys.
+        """
+        self._invalidation_listeners.append(callback)
+
+    async def close(self) -> None:
+        """
+        Stop listening for invalidations.
+        """
+        if self._listener:
+            self._listener.cancel()
+            # Bounded, so a pubsub connection that will not close cannot hold up shutdown
+            await asyncio.wait([self._listener], timeout=1)
+            self._listener = None
     
-    def serialize_object(self, obj) -> str:
+    def serialize_object(self, obj) -> bytes:
         """
-        Serialize an object to a string for caching.
+        Serialize an object for caching, behind a header naming the codec and schema version.
         
         Args:
-            obj: The object to serialize.
+            obj: The object to serialize. Pydantic models, enums and dataclasses are supported.
         Returns:
-            str: The serialized object.
+            bytes: The serialized object.
         """
-        return json.dumps(obj, default=str)
+        return encode_envelope(self.codec, obj)
 
-    def deserialize_object(self, data: str):
+    def deserialize_object(self, data: bytes, model: Optional[Type[BaseModel]] = None):
         """
-        Deserialize a string back into an object.
+        Deserialize a cached payload back into an object.
         Args:
-            data (str): The serialized string to deserialize.
+            data (bytes): The serialized payload.
+            model (Type[BaseModel], optional): Pydantic model to validate the payload into.
         Returns:
-            The deserialized object.
+            The deserialized object, or None if the payload was written by an incompatible release.
         """
-        return json.loads(data)
+        found, value = decode_envelope(data)
+        if not found:
+            return None
+        return model.model_validate(value) if model is not None else value
     
     def generate_key(self, *args) -> str:
         """
@@ -53,36 +138,51 @@ class Cache:
         """
         return ":".join(map(str, args))
     
-    def get_cached(self, key: str):
+    async def get_cached(self, key: str, model: Optional[Type[BaseModel]] = None) -> Any:
         """
         Retrieve an object from the cache.
         
         Args:
             key (str): The cache key.
+            model (Type[BaseModel], optional): Pydantic model to rebuild the cached value as.
         Returns:
             The cached object or None if not found.
         """
         if not self.is_connected:
             self.misses += 1
             return None
+
+        # L1 holds the serialized payload, so every caller gets its own deserialized copy
+        if self.local is not None:
+            data = self.local.get(key)
+            if data is not None:
+                self.hits += 1
+                logger.debug(f"Cache L1 HIT: {key}")
+                return self.deserialize_object(data, model)
             
         try:
             start_time = time.time()
-            data = self.client.get_value(key)
-            if data:
+            data = await self.client.get_value(key)
+            # Entries from another schema version or codec decode to None and count as misses
+            result = self.deserialize_object(data, model) if data else None
+            if result is not None:
                 self.hits += 1
-                result = self.deserialize_object(data)
+                self.redis_hits += 1
+                if self.local is not None:
+                    self.local.set(key, data)
                 logger.debug(f"Cache HIT: {key}")
                 return result
             else:
                 self.misses += 1
+                self.redis_misses += 1
                 logger.debug(f"Cache MISS: {key}")
         except Exception as e:
             self.misses += 1
+            self.redis_misses += 1
             logger.error(f"Cache get error: {e}")
         return None
     
-    def set_cache(self, key: str, obj, ttl: int = 3600) -> None:
+    async def set_cache(self, key: str, obj, ttl: int = 3600, tags: Optional[List[str]] = None) -> None:
         """
         Store an object in the cache.
         
@@ -90,35 +190,123 @@ class Cache:
             key (str): The cache key.
             obj: The object to cache.
             ttl (int): Time to live in seconds. Default is 3600 seconds (1 hour).
+            tags (List[str], optional): Tags to file the key under, for invalidate_tags.
         """
         if not self.is_connected:
             return
             
         try:
             serialized_obj = self.serialize_object(obj)
-            self.client.set_value(key, serialized_obj, ttl)
+            if tags:
+                # Value and tag memberships go out in one pipelined round trip
+                pipe = self.client.get_client().pipeline(transaction=False)
+                self._queue_set(pipe, key, serialized_obj, ttl, tags)
+                await pipe.execute()
+            else:
+                await self.client.set_value(key, serialized_obj, ttl)
+            if self.local is not None:
+                self.local.set(key, serialized_obj, ttl)
         except Exception as e:
             print(f"Cache set error: {e}")
     
-    def delete_cache(self, key: str) -> int:
+    async def get_many(self, keys: List[str], model: Optional[Type[BaseModel]] = None) -> Dict[str, Any]:
         """
-        Delete an object from the cache.
+        Retrieve several objects with one MGET for everything L1 does not hold.
         
         Args:
-            key (str): The cache key.
+            keys (List[str]): The cache keys.
+            model (Type[BaseModel], optional): Pydantic model to rebuild each cached value as.
+        Returns:
+            Dict[str, Any]: The cached objects by key. Missing keys are left out.
+        """
+        if not self.is_connected or not keys:
+            self.misses += len(keys)
+            return {}
+
+        found: Dict[str, Any] = {}
+        remaining = list(dict.fromkeys(keys))
+        if self.local is not None:
+            for key in remaining:
+                data = self.local.get(key)
+                if data is not None:
+                    found[key] = self.deserialize_object(data, model)
+            self.hits += len(found)
+            remaining = [key for key in remaining if key not in found]
+        if not remaining:
+            return found
+
+        try:
+            values = await self.client.get_client().mget(remaining)
+        except Exception as e:
+            logger.error(f"Cache get_many error: {e}")
+            values = [None] * len(remaining)
+        for key, data in zip(remaining, values):
+            result = self.deserialize_object(data, model) if data else None
+            if result is not None:
+                found[key] = result
+                self.hits += 1
+                self.redis_hits += 1
+                if self.local is not None:
+                    self.local.set(key, data)
+            else:
+                self.misses += 1
+                self.redis_misses += 1
+        return found
+
+    async def set_many(self, items: Dict[str, Any], ttl: int = 3600, tags: Optional[Dict[str, List[str]]] = None) -> None:
+        """
+        Store several objects, with their tag memberships, in one pipelined round trip.
+        
+        Args:
+            items (Dict[str, Any]): The objects to cache, by key.
+            ttl (int): Time to live in seconds, for every key. Default is 3600 seconds (1 hour).
+            tags (Dict[str, List[str]], optional): Tags to file each key under, for invalidate_tags.
+        """
+        if not self.is_connected or not items:
+            return
+
+        try:
+            serialized = {key: self.serialize_object(obj) for key, obj in items.items()}
+            pipe = self.client.get_client().pipeline(transaction=False)
+            for key, serialized_obj in serialized.items():
+                self._queue_set(pipe, key, serialized_obj, ttl, (tags or {}).get(key))
+            await pipe.execute()
+            if self.local is not None:
+                for key, serialized_obj in serialized.items():
+                    self.local.set(key, serialized_obj, ttl)
+        except Exception as e:
+            logger.error(f"Cache set_many error: {e}")
+
+    def _queue_set(self, pipe, key: str, serialized_obj: bytes, ttl: int, tags: Optional[List[str]]) -> None:
+        pipe.set(key, serialized_obj, ex=ttl)
+        for tag in tags or []:
+            # Tag sets live at least as long as the longest-lived key they track
+            tag_key = self.tag_key(tag)
+            pipe.sadd(tag_key, key)
+            pipe.expire(tag_key, ttl, nx=True)
+            pipe.expire(tag_key, ttl, gt=True)
+    
+    async def delete_cache(self, *keys: str) -> int:
+        """
+        Delete one or more objects from the cache with a single DEL.
+        
+        Args:
+            *keys (str): The cache keys.
         Returns:
             int: Number of keys that were removed.
         """
-        if not self.is_connected:
+        if not self.is_connected or not keys:
             return 0
             
         try:
-            return self.client.delete_value(key)
+            removed = await self.client.get_client().delete(*keys)
+            await self._publish_invalidation("delete", list(keys))
+            return removed
         except Exception as e:
             print(f"Cache delete error: {e}")
             return 0
     
-    def clear_cache(self) -> None:
+    async def clear_cache(self) -> None:
         """
         Clear the entire cache.
         """
@@ -126,23 +314,107 @@ class Cache:
             return
             
         try:
-            self.client.get_client().flushdb()
+            await self.client.get_client().flushdb()
+            await self._publish_invalidation("clear")
         except Exception as e:
             print(f"Cache clear error: {e}")
         
-    def invalidate(self, pattern: str) -> None:
+    def tag_key(self, tag: str) -> str:
+        """
+        Redis key of the set that tracks a tag's members.
         """
-        Invalidate cache entries matching a pattern.
+        return f"{self.TAG_PREFIX}:{tag}"
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Invalidate every entry filed under any of the given tags.
+
+        Runs as one server-side script, so the cost is a single round trip however
+        many tags are given and however large the keyspace is.
         
         Args:
-            pattern (str): The pattern to match keys against.
+            *tags (str): The tags to invalidate.
+        Returns:
+            int: Number of keys that were removed.
         """
-        if not self.is_connected:
-            return
+        if not self.is_connected or not tags:
+            return 0
             
         try:
-            keys = self.client.get_client().keys(pattern)
-            if keys:
-                self.client.get_client().delete(*keys)
+            if self._invalidate_tags_script is None:
+                self._invalidate_tags_script = self.client.get_client().register_script(INVALIDATE_TAGS_SCRIPT)
+            channel = self.INVALIDATION_CHANNEL if self.tracks_invalidations else ""
+            removed = await self._invalidate_tags_script(keys=[self.tag_key(tag) for tag in tags], args=[channel])
+            if self.tracks_invalidations:
+                # Applied here too, so this worker never serves a stale L1 entry while the message is in flight
+                self._apply_invalidation("delete", [k.decode() if isinstance(k, bytes) else k for k in removed])
+            return len(removed)
         except Exception as e:
-            print(f"Cache invalidate error: {e}")
\ No newline at end of file
+            print(f"Cache invalidate error: {e}")
+            return 0
+
+    def get_tier_stats(self) -> dict:
+        """
+        Hit and miss counts per tier.
+
+        Returns:
+            dict: Counters for the L1 (if enabled) and Redis tiers.
+        """
+        stats = {
+            "redis": {"hits": self.redis_hits, "misses": self.redis_misses}
+        }
+        if self.local is not None:
+            stats["l1"] = {
+                "hits": self.local.hits,
+                "misses": self.local.misses,
+                "evictions": self.local.evictions,
+                "size": len(self.local),
+                "max_size": self.local.max_size
+            }
+        return stats
+
+    async def _publish_invalidation(self, op: str, targets: List[str] = None) -> None:
+        """
+        Drop entries from this worker's L1 and tell the other workers to do the same.
+
+        Args:
+            op (str): "delete" for a list of keys, "clear" for everything.
+            targets (List[str], optional): The keys to delete.
+        """
+        if not self.tracks_invalidations:
+            return
+        self._apply_invalidation(op, targets)
+        await self.client.get_client().publish(self.INVALIDATION_CHANNEL, json.dumps({"op": op, "targets": targets}))
+
+    def _apply_invalidation(self, op: str, targets: List[str] = None) -> None:
+        if self.local is not None:
+            if op == "delete":
+                for key in targets or []:
+                    self.local.delete(key)
+            elif op == "clear":
+                self.local.clear()
+        for callback in self._invalidation_listeners:
+            try:
+                callback(op, targets)
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed: {e}")
+
+    async def _listen_for_invalidations(self) -> None:
+        while True:
+            pubsub = self.client.get_client().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    event = json.loads(message["data"])
+                    self._apply_invalidation(event.get("op"), event.get("targets"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries cached while we cannot hear invalidations may be stale, so start over
+                logger.error(f"Cache invalidation listener error: {e}")
+                self._apply_invalidation("clear")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
\ No newline at end of file
@@ -0,0 +1,150 @@
+import os
+import json
+from abc import ABC, abstractmethod
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional speedup
+    msgpack = None
+
+# Bump whenever the shape of cached values changes: entries written under another version
+# are treated as misses, so old and new workers never misread each other during a rolling deploy
+CACHE_SCHEMA_VERSION = 1
+
+def to_primitive(obj: Any) -> Any:
+    """
+    Fallback for types the codecs do not handle natively: Pydantic models, enums and dataclasses.
+    Raises TypeError for anything else, rather than silently caching its str().
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Enum):
+        return obj.value
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    raise TypeError(f"Cannot cache object of type {type(obj).__name__}")
+
+class CacheCodec(ABC):
+    """
+    Turns cached values into bytes and back.
+    """
+    name: str
+
+    @abstractmethod
+    def encode(self, obj: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes) -> Any:
+        pass
+
+class JsonCodec(CacheCodec):
+    """
+    Standard library JSON. Always available, and the slowest.
+    """
+    name = "json"
+
+    def encode(self, obj: Any) -> bytes:
+        return json.dumps(obj, default=to_primitive, separators=(",", ":")).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+class OrjsonCodec(CacheCodec):
+    """
+    orjson: JSON output, several times faster than the standard library.
+    Enums and dataclasses are handled natively.
+    """
+    name = "orjson"
+
+    def encode(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=to_primitive)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+class MsgpackCodec(CacheCodec):
+    """
+    MessagePack: compact binary output, smallest payloads.
+    """
+    name = "msgpack"
+
+    def encode(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, default=to_primitive, use_bin_type=True)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+class CodecFactory:
+    """
+    Factory class for creating cache codecs.
+    """
+    CODECS: Dict[str, type] = {
+        JsonCodec.name: JsonCodec,
+        OrjsonCodec.name: OrjsonCodec,
+        MsgpackCodec.name: MsgpackCodec,
+    }
+    _instances: Dict[str, CacheCodec] = {}
+
+    @classmethod
+    def available(cls, codec_type: str) -> bool:
+        """
+        Whether a codec's library is installed.
+        """
+        return codec_type == JsonCodec.name or \
+            (codec_type == OrjsonCodec.name and orjson is not None) or \
+            (codec_type == MsgpackCodec.name and msgpack is not None)
+
+    @classmethod
+    def create_codec(cls, codec_type: str = None) -> CacheCodec:
+        """
+        Create a codec based on the specified type.
+
+        Args:
+            codec_type: "orjson", "msgpack" or "json". Defaults to the CACHE_CODEC environment
+                variable, then "orjson" if it is installed, then "json"
+
+        Returns:
+            CacheCodec: The codec, shared by every caller
+        """
+        codec_type = codec_type or os.getenv("CACHE_CODEC") or \
+            (OrjsonCodec.name if orjson is not None else JsonCodec.name)
+        if codec_type not in cls.CODECS:
+            raise ValueError(f"Unknown cache codec: {codec_type}")
+        if not cls.available(codec_type):
+            raise ValueError(f"Cache codec {codec_type} is not installed")
+        if codec_type not in cls._instances:
+            cls._instances[codec_type] = cls.CODECS[codec_type]()
+        return cls._instances[codec_type]
+
+def encode_envelope(codec: CacheCodec, obj: Any) -> bytes:
+    """
+    Encode a value behind a header naming its codec and schema version, e.g. b"orjson:1|...".
+    """
+    return f"{codec.name}:{CACHE_SCHEMA_VERSION}|".encode() + codec.encode(obj)
+
+def decode_envelope(data: bytes) -> Tuple[bool, Optional[Any]]:
+    """
+    Decode a value written by encode_envelope, with whichever codec wrote it.
+
+    Returns:
+        (found, value). found is False for entries from another schema version, an unavailable
+        codec, or a release that wrote no header; callers treat those as misses.
+    """
+    header, separator, payload = data.partition(b"|")
+    if not separator:
+        return False, None
+    name, _, version = header.decode(errors="replace").partition(":")
+    if version != str(CACHE_SCHEMA_VERSION) or name not in CodecFactory.CODECS or not CodecFactory.available(name):
+        return False, None
+    return True, CodecFactory.create_codec(name).decode(payload)
@@ -0,0 +1,84 @@
+import base64
+import json
+from typing import Any, List, Tuple
+
+# Paging directions encoded in a cursor
+OLDER = "older"
+NEWER = "newer"
+
+def encode_cursor(direction: str, timestamp: float, message_id: str) -> str:
+    """
+    Encode a keyset position into an opaque, URL-safe cursor token.
+
+    Args:
+        direction (str): OLDER to page back in history, NEWER to page forward.
+        timestamp (float): Timestamp of the boundary message.
+        message_id (str): ID of the boundary message, used to break timestamp ties.
+    Returns:
+        str: The cursor token.
+    """
+    return _encode([direction, timestamp, message_id])
+
+def decode_cursor(token: str) -> Tuple[str, float, str]:
+    """
+    Decode a cursor token produced by encode_cursor.
+
+    Args:
+        token (str): The cursor token.
+    Returns:
+        Tuple[str, float, str]: The direction, timestamp and message ID.
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        direction, timestamp, message_id = _decode(token)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+    if direction not in (OLDER, NEWER) or not isinstance(timestamp, (int, float)) or not isinstance(message_id, str):
+        raise ValueError(f"Invalid cursor: {token}")
+    return direction, float(timestamp), message_id
+
+def encode_search_cursor(score: float, timestamp: float, message_id: str) -> str:
+    """
+    Encode a search result position into an opaque, URL-safe cursor token.
+
+    Args:
+        score (float): Rank of the boundary result.
+        timestamp (float): Timestamp of the boundary message.
+        message_id (str): ID of the boundary message.
+    Returns:
+        str: The cursor token.
+    """
+    return _encode([score, timestamp, message_id])
+
+def decode_search_cursor(token: str) -> Tuple[float, float, str]:
+    """
+    Decode a cursor token produced by encode_search_cursor.
+
+    Args:
+        token (str): The cursor token.
+    Returns:
+        Tuple[float, float, str]: The score, timestamp and message ID.
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        score, timestamp, message_id = _decode(token)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+    if not isinstance(score, (int, float)) or not isinstance(timestamp, (int, float)) or not isinstance(message_id, str):
+        raise ValueError(f"Invalid cursor: {token}")
+    return float(score), float(timestamp), message_id
+
+def _encode(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode(token: str) -> Any:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
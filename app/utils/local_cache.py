@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+class LocalCache:
+    """
+    Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Used as the L1 tier in front of Redis. Entries only live in this worker, so
+    anything that changes shared data must also be invalidated on the other workers
+    (Cache does this over Redis pub/sub).
+    """
+    def __init__(self, max_size: int = 10000, ttl: float = 30):
+        self.max_size = max_size
+        self.ttl = ttl
+        # key -> (expires_at, value), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value and mark it as recently used.
+
+        Args:
+            key (str): The cache key.
+        Returns:
+            The value, or None if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float = None) -> None:
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (str): The cache key.
+            value: The value to store.
+            ttl (float, optional): Lifetime in seconds, capped at the cache's own TTL.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a key if present.
+        """
+        self._entries.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> None:
+        """
+        Remove every entry whose value matches a predicate. O(size), meant for rare invalidations.
+        """
+        for key in [k for k, (_, value) in self._entries.items() if predicate(value)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """
+        Remove every entry.
+        """
+        self._entries.clear()
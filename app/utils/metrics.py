@@ -0,0 +1,68 @@
+import time
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.db.query_stats import record_query
+
+# Metrics are process-wide, registered once in prometheus_client's default registry and served on /metrics.
+# Labels are kept to bounded sets (route templates, statement and command names) so series do not grow with traffic.
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by response status", ["method", "route", "status"]
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "SQL statement latency; the _count series is the query count", ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds", "Redis command latency; pipelines count as one PIPELINE command", ["command"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection, including opening new ones",
+    ["engine"], buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ["engine"]
+)
+WS_ACTIVE_CONNECTIONS = Gauge(
+    "websocket_active_connections", "WebSocket connections open on this worker"
+)
+WS_FANOUT_DURATION = Histogram(
+    "websocket_fanout_duration_seconds", "Time to hand one broadcast to this worker's sockets",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1)
+)
+WS_FANOUT_RECIPIENTS = Histogram(
+    "websocket_fanout_recipients", "Local sockets reached by one broadcast",
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Time every statement the engine runs, and count it against the current request.
+    
+    Args:
+        engine: A sync engine; for an AsyncEngine pass engine.sync_engine
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERY_DURATION.labels(operation=operation).observe(elapsed)
+        # Per-request totals, for the query-stats header and logs
+        record_query(elapsed, cursor.rowcount)
+
+    @event.listens_for(engine, "handle_error")
+    def _drop_timer(exception_context):
+        # Failed statements never reach after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_time"):
+            connection.info["query_start_time"].pop()
@@ -0,0 +1,181 @@
+import os
+import json
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional, Set
+from redis.asyncio import Redis
+
+from app.db.redis_client import RedisClient
+
+logger = logging.getLogger("main.websocket.backends")
+
+# Called with (conversation_id, message) for every message this worker must deliver to its local sockets
+DeliverCallback = Callable[[str, dict], Awaitable[None]]
+
+class BroadcastBackend(ABC):
+    """
+    Carries broadcast messages to every worker that has sockets in a conversation.
+
+    The ConnectionManager publishes through the backend and receives messages back
+    through the deliver callback, including the ones it published itself.
+    """
+    def __init__(self):
+        self._deliver: Optional[DeliverCallback] = None
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        """
+        Start the backend.
+        @param deliver: Coroutine that hands a message to this worker's local sockets.
+        """
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        """
+        Stop the backend and release its resources.
+        """
+        self._deliver = None
+
+    @abstractmethod
+    async def subscribe(self, conversation_id: str) -> None:
+        """
+        Start receiving messages for a conversation. Called when the first local socket joins it.
+        @param conversation_id: The ID of the conversation.
+        """
+        pass
+
+    @abstractmethod
+    async def unsubscribe(self, conversation_id: str) -> None:
+        """
+        Stop receiving messages for a conversation. Called when the last local socket leaves it.
+        @param conversation_id: The ID of the conversation.
+        """
+        pass
+
+    @abstractmethod
+    async def publish(self, conversation_id: str, message: dict) -> None:
+        """
+        Send a message to every subscriber of a conversation.
+        @param conversation_id: The ID of the conversation.
+        @param message: The message to send. Must be JSON serializable.
+        """
+        pass
+
+class InMemoryBroadcastBackend(BroadcastBackend):
+    """
+    Single-process backend: published messages are delivered straight to local sockets.
+    """
+    async def subscribe(self, conversation_id: str) -> None:
+        pass
+
+    async def unsubscribe(self, conversation_id: str) -> None:
+        pass
+
+    async def publish(self, conversation_id: str, message: dict) -> None:
+        if self._deliver:
+            await self._deliver(conversation_id, message)
+
+class RedisBroadcastBackend(BroadcastBackend):
+    """
+    Multi-worker backend built on Redis pub/sub, with one channel per conversation.
+
+    Each worker subscribes only to the conversations it has sockets for, and a single
+    listener task per worker hands incoming messages to the local sockets.
+    Delivery is at-most-once: a worker that is disconnected from Redis misses messages
+    published in the meantime, and clients recover them from the history endpoint.
+    """
+    CHANNEL_PREFIX = "chat:conversation"
+
+    def __init__(self, redis_client: RedisClient):
+        super().__init__()
+        # Publishes share the client's pool; the pubsub holds one pooled connection for itself
+        self._client: Redis = redis_client.get_client()
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._channels: Set[str] = set()
+        self._has_channels = asyncio.Event()
+        self._listener: Optional[asyncio.Task] = None
+
+    def channel_for(self, conversation_id: str) -> str:
+        return f"{self.CHANNEL_PREFIX}:{conversation_id}"
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        await super().start(deliver)
+        self._listener = asyncio.create_task(self._listen())
+        logger.info("Redis broadcast backend started")
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._pubsub.aclose()
+        await super().stop()
+
+    async def subscribe(self, conversation_id: str) -> None:
+        channel = self.channel_for(conversation_id)
+        if channel in self._channels:
+            return
+        self._channels.add(channel)
+        await self._pubsub.subscribe(channel)
+        self._has_channels.set()
+
+    async def unsubscribe(self, conversation_id: str) -> None:
+        channel = self.channel_for(conversation_id)
+        if channel not in self._channels:
+            return
+        self._channels.discard(channel)
+        if not self._channels:
+            self._has_channels.clear()
+        await self._pubsub.unsubscribe(channel)
+
+    async def publish(self, conversation_id: str, message: dict) -> None:
+        await self._client.publish(self.channel_for(conversation_id), json.dumps(message, default=str))
+
+    async def _listen(self) -> None:
+        """
+        Read messages from every subscribed channel and deliver them locally.
+        """
+        prefix_length = len(self.CHANNEL_PREFIX) + 1
+        while True:
+            try:
+                # The pubsub connection only exists once something is subscribed
+                await self._has_channels.wait()
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message or message.get("type") != "message":
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                await self._deliver(channel[prefix_length:], json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis broadcast listener error: {e}")
+                await asyncio.sleep(1)
+
+class BroadcastBackendFactory:
+    """
+    Factory class for creating the broadcast backend selected by configuration.
+    """
+    @classmethod
+    def create_backend(cls, backend_type: str = None, redis_client: RedisClient = None) -> BroadcastBackend:
+        """
+        Create a broadcast backend based on the specified type.
+
+        Args:
+            backend_type: "memory" or "redis". Defaults to the BROADCAST_BACKEND environment variable, then "memory"
+            redis_client: Supplies the Redis connection settings for the "redis" backend
+
+        Returns:
+            BroadcastBackend: An instance of the specified backend type
+        """
+        backend_type = backend_type or os.getenv("BROADCAST_BACKEND", "memory")
+        if backend_type == "memory":
+            return InMemoryBroadcastBackend()
+        elif backend_type == "redis":
+            return RedisBroadcastBackend(redis_client or RedisClient())
+        else:
+            raise ValueError(f"Unknown broadcast backend: {backend_type}")
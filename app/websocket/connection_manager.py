@@ -1,12 +1,123 @@
-from typing import Dict
+from typing import Dict, Optional, Set
 from fastapi import WebSocket
+import os
+import asyncio
+import logging
+import time
+
+from app.utils.metrics import WS_ACTIVE_CONNECTIONS, WS_FANOUT_DURATION, WS_FANOUT_RECIPIENTS
+from app.websocket.backends import BroadcastBackend, InMemoryBroadcastBackend
+
+logger = logging.getLogger("main.websocket.connection_manager")
+
+# Outbound messages buffered per socket before the overflow policy applies
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", 100))
+# "disconnect" closes a socket whose queue is full, "drop" discards the new message instead
+WS_OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", "disconnect")
+# Seconds to wait for a close frame to an evicted socket before giving up on it
+WS_CLOSE_TIMEOUT = float(os.getenv("WS_CLOSE_TIMEOUT", 5))
+
+# Close code sent to evicted slow consumers ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+class ClientConnection:
+    """
+    A WebSocket with a bounded outbound queue drained by its own writer task,
+    so a slow peer only ever delays its own messages.
+    """
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+
+    def start(self, on_error):
+        """
+        Start the writer task.
+        @param on_error: Coroutine called with this connection if a send fails.
+        """
+        self.writer = asyncio.create_task(self._write(on_error))
+
+    def enqueue(self, message: dict) -> bool:
+        """
+        Queue a message without waiting.
+        @param message: The message to send.
+        @return: False if the queue is full and the message was not queued.
+        """
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def close(self, code: Optional[int] = None):
+        """
+        Stop the writer task and, if a code is given, close the socket with it.
+        @param code: WebSocket close code to send.
+        """
+        if self.writer and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        if code is not None:
+            try:
+                await asyncio.wait_for(self.websocket.close(code=code), timeout=WS_CLOSE_TIMEOUT)
+            except Exception as e:
+                logger.debug(f"Failed to close websocket cleanly: {e}")
+
+    async def _write(self, on_error):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websocket.send_json(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket send failed, dropping connection: {e}")
+                await on_error(self)
+                return
 
 class ConnectionManager:
     """
     A class to manage WebSocket connections for different conversations.
+
+    Sockets are tracked per worker. Broadcasts go through a BroadcastBackend so that
+    every worker with sockets in the conversation delivers the message to them.
+    Local delivery only enqueues; each socket's writer task does the actual send.
     """
-    def __init__(self):
-        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
+    def __init__(self, backend: BroadcastBackend = None, queue_size: int = None, overflow_policy: str = None):
+        self.active_connections: Dict[str, Dict[str, ClientConnection]] = {}
+        self.backend = backend or InMemoryBroadcastBackend()
+        self.queue_size = queue_size or WS_SEND_QUEUE_SIZE
+        self.overflow_policy = overflow_policy or WS_OVERFLOW_POLICY
+        if self.overflow_policy not in ("disconnect", "drop"):
+            raise ValueError(f"Unknown overflow policy: {self.overflow_policy}")
+        self.evicted_connections = 0
+        self.dropped_messages = 0
+        # Close handshakes of evicted sockets, held so they are not garbage collected mid-close
+        self._closing: Set[asyncio.Task] = set()
+        # Read at scrape time
+        WS_ACTIVE_CONNECTIONS.set_function(self.connection_count)
+
+    def connection_count(self) -> int:
+        """
+        Number of WebSocket connections open on this worker.
+        """
+        return sum(len(connections) for connections in self.active_connections.values())
+
+    async def start(self):
+        """
+        Start the broadcast backend. Must be called before the first broadcast.
+        """
+        await self.backend.start(self.deliver_local)
+
+    async def stop(self):
+        """
+        Stop the broadcast backend and every writer task.
+        """
+        await self.backend.stop()
+        for connections in self.active_connections.values():
+            for connection in connections.values():
+                await connection.close()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
         
     async def connect(self, conversation_id: str, user_id: str, websocket: WebSocket):
         """
@@ -19,23 +130,66 @@ class ConnectionManager:
         await websocket.accept()
         if conversation_id not in self.active_connections:
             self.active_connections[conversation_id] = {}
-        self.active_connections[conversation_id][user_id] = websocket
+            await self.backend.subscribe(conversation_id)
+
+        connection = ClientConnection(websocket, self.queue_size)
+        connection.start(lambda conn: self._remove(conversation_id, user_id, conn))
+        previous = self.active_connections[conversation_id].get(user_id)
+        self.active_connections[conversation_id][user_id] = connection
+        if previous:
+            await previous.close()
 
-    def disconnect(self, conversation_id: str, user_id: str):
+    async def disconnect(self, conversation_id: str, user_id: str, websocket: WebSocket = None):
         """
         Remove a WebSocket connection from the manager.
         @param conversation_id: The ID of the conversation.
         @param user_id: The ID of the user.
+        @param websocket: If given, only remove the connection if it still belongs to this socket.
         """
-        if conversation_id in self.active_connections:
-            self.active_connections[conversation_id].pop(user_id, None)
+        connection = self.active_connections.get(conversation_id, {}).get(user_id)
+        if connection is None or (websocket is not None and connection.websocket is not websocket):
+            return
+        await self._remove(conversation_id, user_id, connection)
 
     async def broadcast(self, conversation_id: str, message: dict):
         """
-        Send a message to all WebSocket connections in a conversation.
+        Send a message to all WebSocket connections in a conversation, on every worker.
         @param conversation_id: The ID of the conversation.
         @param message: The message to send.
         """
-        if conversation_id in self.active_connections:
-            for user_id, websocket in self.active_connections[conversation_id].items():
-                await websocket.send_json(message)
+        await self.backend.publish(conversation_id, message)
+
+    async def deliver_local(self, conversation_id: str, message: dict):
+        """
+        Queue a message for this worker's WebSocket connections in a conversation.
+        Never waits on a peer: full queues are handled by the overflow policy.
+        @param conversation_id: The ID of the conversation.
+        @param message: The message to send.
+        """
+        start = time.perf_counter()
+        recipients = list(self.active_connections.get(conversation_id, {}).items())
+        for user_id, connection in recipients:
+            if connection.enqueue(message):
+                continue
+
+            if self.overflow_policy == "drop":
+                self.dropped_messages += 1
+            else:
+                logger.warning(f"Evicting slow consumer {user_id} from conversation {conversation_id}")
+                self.evicted_connections += 1
+                await self._remove(conversation_id, user_id, connection)
+                task = asyncio.create_task(connection.close(code=SLOW_CONSUMER_CLOSE_CODE))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+        WS_FANOUT_DURATION.observe(time.perf_counter() - start)
+        WS_FANOUT_RECIPIENTS.observe(len(recipients))
+
+    async def _remove(self, conversation_id: str, user_id: str, connection: ClientConnection):
+        connections = self.active_connections.get(conversation_id)
+        if not connections or connections.get(user_id) is not connection:
+            return
+        del connections[user_id]
+        await connection.close()
+        if not connections:
+            del self.active_connections[conversation_id]
+            await self.backend.unsubscribe(conversation_id)
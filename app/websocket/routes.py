@@ -1,9 +1,13 @@
-from fastapi import APIRouter, WebSocket, Query, WebSocketDisconnect
+from fastapi import APIRouter, WebSocket, Query, WebSocketDisconnect, status
 import logging
 import json
 
+from app.db import SessionLocal
 from app.security.jwt_handler import decode_access_token
 from app.models.message import MessageCreateRequest
+from app.services.user_service import UserService
+from app.services.conversation_service import ConversationService
+from app.services.message_service import MessageService
 
 router = APIRouter()
 logger = logging.getLogger("main.websocket.routes")
@@ -20,13 +24,21 @@ async def get_user_id_from_token(token: str) -> str:
 @router.websocket("/ws/{conversation_id}")
 async def websocket_endpoint(websocket: WebSocket, conversation_id: str, token: str = Query(None)):
     user_id = await get_user_id_from_token(token)
-    message_service = websocket.app.state.message_service
     manager = websocket.app.state.connection_manager
-    conversation_service = websocket.app.state.conversation_service
+    ingestor = websocket.app.state.message_ingestor
+    cache = websocket.app.state.cache
 
     if not user_id:
         return
 
+    # Membership is checked once before the socket is accepted; frames re-check against the cached member set
+    async with SessionLocal() as db:
+        conversation_service = ConversationService(UserService(db, cache), db, cache)
+        if not await conversation_service.check_if_user_has_access_to_conversation(user_id, conversation_id):
+            logger.info(f"User {user_id} attempted to connect to unauthorized conversation {conversation_id}")
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
     logger.info(f"User {user_id} connected to conversation {conversation_id}")
     await manager.connect(conversation_id, user_id, websocket)
     try:
@@ -34,21 +46,36 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str, token:
             data_json = json.loads(await websocket.receive_text())
             data_json["conversation_id"] = conversation_id
             message_request = MessageCreateRequest(**data_json)
-            message = message_service.create_message(message_request, user_id)
-            
-            if not conversation_service.check_if_user_has_access_to_conversation(user_id, conversation_id):
-                logger.info(f"User {user_id} attempted to send message to unauthorized conversation {conversation_id}")
-                await websocket.send_json({"error": "Unauthorized access to conversation"})
-                continue
-
-            logger.info(f"User {user_id} sent a message in conversation {conversation_id}: {message.content}")
-            message_response = message_service.create_message_response(message, websocket.app.state.user_service, conversation_service)
+
+            # Each frame gets its own session so a long-lived socket never pins a connection
+            async with SessionLocal() as db:
+                user_service = UserService(db, cache)
+                conversation_service = ConversationService(user_service, db, cache)
+                message_service = MessageService(db)
+
+                # Checked before the message is accepted: a batched insert must not carry rows that fail.
+                # Membership can change while the socket is open, so this is cache-backed rather than skipped
+                if not await conversation_service.check_if_user_has_access_to_conversation(user_id, conversation_id):
+                    logger.info(f"User {user_id} attempted to send message to unauthorized conversation {conversation_id}")
+                    await websocket.send_json({"error": "Unauthorized access to conversation"})
+                    continue
+
+                # Persistence is write-behind: the message is queued for a batched insert and broadcast right away
+                message = message_service.build_message(message_request, user_id)
+                await ingestor.submit(message)
+
+                logger.info(f"User {user_id} sent a message in conversation {conversation_id}: {message.content}")
+                message_response = await message_service.create_message_response(message, user_service, conversation_service)
+
             await manager.broadcast(conversation_id, message_response.dict())
 
+    except WebSocketDisconnect:
+        logger.info(f"User {user_id} disconnected from conversation {conversation_id}")
+
     except Exception as e:
         logger.error(f"Error occurred for user {user_id} in conversation {conversation_id}: {str(e)}")
         await websocket.send_json({"error": str(e)})
-    
-    except WebSocketDisconnect:
-        logger.error(f"User {user_id} disconnected from conversation {conversation_id}")
-        manager.disconnect(conversation_id, user_id)
\ No newline at end of file
+
+    finally:
+        # Always release the socket, so the backend can drop the conversation's subscription
+        await manager.disconnect(conversation_id, user_id, websocket)
\ No newline at end of file